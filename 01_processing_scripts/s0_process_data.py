@@ -6,6 +6,7 @@
 
 import os
 import argparse
+import contextlib
 
 import s1_calculate_climtrace_gmst
 import s2_calculate_climtrace_gsat
@@ -14,6 +15,9 @@ import s4_process_scenario_data
 import s5_test_acceleration
 import s6_calculate_recent_trends
 import s7_calculate_gmst2gsat_factors
+from utils import su5_instrumentation as instr
+from utils import su8_regression_grid_search as grid_search
+from utils import su9_regression_bootstrap as bootstrap
 
 # argparse for optional regression
 def parse_regression_args():
@@ -45,10 +49,68 @@ def parse_regression_args():
         help="Smooth values (one per regression type).",
     )
 
+    # --optimize argument
+    parser.add_argument(
+        "--optimize",
+        choices=["cv_r2", "residual_variance"],
+        help=(
+            "Choose --lag and --smooth of the regressors by a grid search "
+            "on the monthly ClimTrace GMST, scored by cross-validated R² "
+            "or residual variance."
+        ),
+    )
+
+    # --optimize-lags argument
+    parser.add_argument(
+        "--optimize-lags",
+        type=int,
+        nargs="+",
+        default=list(range(0, 13)),
+        help="Lag values (months) searched with --optimize.",
+    )
+
+    # --optimize-smooth argument
+    parser.add_argument(
+        "--optimize-smooth",
+        type=int,
+        nargs="+",
+        default=[1, 3, 5, 7, 9, 11],
+        help="Smooth values (months) searched with --optimize.",
+    )
+
+    # --bootstrap argument
+    parser.add_argument(
+        "--bootstrap",
+        metavar="N",
+        type=int,
+        help=(
+            "Estimate the uncertainty of the regression coefficients and "
+            "of the regressed monthly ClimTrace GMST from N block-bootstrap "
+            "replicates."
+        ),
+    )
+
+    # --instrument argument
+    parser.add_argument(
+        "--instrument",
+        metavar="PATH",
+        help=(
+            "Record per-step timings of the MW-EOT smoother to this "
+            "JSON-lines file, replacing its contents, and print a summary. "
+            f"Without it, a file set in {instr.ENV_VARIABLE} is appended to."
+        ),
+    )
+
     args = parser.parse_args()
 
     # Validate that --lag and --smooth are correctly provided if --regress is given
-    if args.regress:
+    if args.optimize and not args.regress:
+        parser.error("--optimize requires --regress.")
+
+    if args.bootstrap and not args.regress:
+        parser.error("--bootstrap requires --regress.")
+
+    if args.regress and not args.optimize:
         expected_count = len(args.regress)
 
         if args.lag is None or len(args.lag) != expected_count:
@@ -64,16 +126,110 @@ def parse_regression_args():
     return args
 
 
+def read_monthly_gmst():
+    return s1_calculate_climtrace_gmst.monthly_gmst_data(
+        os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "..",
+            "00_input_data",
+            "surface_temperature",
+        )
+    )
+
+
+def optimize_regression(args):
+    gmst_data = read_monthly_gmst()
+
+    results, best = grid_search.grid_search_regression(
+        gmst_data["ClimTrace_GMST"],
+        args.regress,
+        lags=args.optimize_lags,
+        smoothers=args.optimize_smooth,
+        data_smoother=5,
+        sequential=True,
+        score=args.optimize,
+    )
+
+    print(results.head(10).to_string())
+    print(f"Optimal lags: {best['lags']}, smooths: {best['smoothers']}")
+
+    return best["lags"], best["smoothers"]
+
+
+def bootstrap_regression(args):
+    gmst_data = read_monthly_gmst()
+
+    results = bootstrap.regression_bootstrap(
+        gmst_data["ClimTrace_GMST"],
+        args.regress,
+        args.lag,
+        args.smooth,
+        data_smoother=5,
+        sequential=True,
+        n_replicates=args.bootstrap,
+    )
+
+    print(results["coefficient_quantiles"].to_string())
+
+    filename = s1_calculate_climtrace_gmst.get_output_filename(
+        args.regress, args.lag, args.smooth
+    )
+    output_dir = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "..", "02_output_data"
+    )
+    results["coefficient_quantiles"].to_csv(
+        os.path.join(
+            output_dir,
+            filename.replace("gmst_annual_", "regression_bootstrap_coefficients_"),
+        )
+    )
+    results["residual_quantiles"].to_csv(
+        os.path.join(
+            output_dir,
+            filename.replace("gmst_annual_", "gmst_monthly_bootstrap_"),
+        )
+    )
+
+
 def main():
     args = parse_regression_args()
 
-    s1_calculate_climtrace_gmst.main(args.regress, args.lag, args.smooth)
-    s2_calculate_climtrace_gsat.main(args.regress, args.lag, args.smooth)
-    s3_calculate_decadal_means_trend_rates.main(args.regress, args.lag, args.smooth)
-    s4_process_scenario_data.main(args.regress, args.lag, args.smooth)
-    s5_test_acceleration.main(args.regress, args.lag, args.smooth)
-    s6_calculate_recent_trends.main()
-    s7_calculate_gmst2gsat_factors.main()
+    if args.optimize:
+        args.lag, args.smooth = optimize_regression(args)
+
+    if args.bootstrap:
+        bootstrap_regression(args)
+
+    # only a log given on the command line starts afresh; one set in the
+    # environment may be shared with other runs and is appended to
+    instrument = args.instrument
+    if instrument is not None and os.path.exists(instrument):
+        os.remove(instrument)
+    if instrument is None:
+        instrument = os.environ.get(instr.ENV_VARIABLE)
+
+    def stage(name):
+        if instrument is None:
+            return contextlib.nullcontext()
+        return instr.instrumented(instrument, stage=name)
+
+    with stage("s1"):
+        s1_calculate_climtrace_gmst.main(args.regress, args.lag, args.smooth)
+    with stage("s2"):
+        s2_calculate_climtrace_gsat.main(args.regress, args.lag, args.smooth)
+    with stage("s3"):
+        s3_calculate_decadal_means_trend_rates.main(args.regress, args.lag, args.smooth)
+    with stage("s4"):
+        s4_process_scenario_data.main(args.regress, args.lag, args.smooth)
+    with stage("s5"):
+        s5_test_acceleration.main(args.regress, args.lag, args.smooth)
+    with stage("s6"):
+        s6_calculate_recent_trends.main()
+    with stage("s7"):
+        s7_calculate_gmst2gsat_factors.main()
+
+    if instrument is not None and os.path.exists(instrument):
+        print(instr.aggregate_records(instr.read_records(instrument)))
 
 
 if __name__ == "__main__":
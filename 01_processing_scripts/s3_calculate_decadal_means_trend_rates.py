@@ -65,29 +65,42 @@ def main(regress=None, lag=None, smooth=None):
         "02_output_data",
     )
 
-    for var in ["GMST", "GSAT"]:
+    variables = ["GMST", "GSAT"]
 
+    annual_data = {}
+    for var in variables:
         input_filename = get_input_filename(var, regress, lag, smooth)
-        annual_data = read_annual_climtrace_gst(data_dir, input_filename)
-
-        (
-            decadal_mean,
-            decadal_derivative,
-            decadal_mean_sigma,
-            decadal_derivative_sigma,
-        ) = eot_decadal_mean.mw_eot_smoother(
-            annual_data[f"ClimTrace_{var}"],
-            annual_data[f"ClimTrace_{var}_1sigma"],
-            nStart=1850,
-            nEnd=2040,
-        )
+        annual_data[var] = read_annual_climtrace_gst(data_dir, input_filename)
+
+    # smooth all variables in one batched call
+    (
+        decadal_mean,
+        decadal_derivative,
+        decadal_mean_sigma,
+        decadal_derivative_sigma,
+    ) = eot_decadal_mean.mw_eot_smoother_batch(
+        pd.concat(
+            [annual_data[var][f"ClimTrace_{var}"] for var in variables],
+            axis=1,
+            keys=variables,
+        ),
+        pd.concat(
+            [annual_data[var][f"ClimTrace_{var}_1sigma"] for var in variables],
+            axis=1,
+            keys=variables,
+        ),
+        nStart=1850,
+        nEnd=2040,
+    )
+
+    for var in variables:
 
         output = pd.concat(
             [
-                decadal_mean,
-                decadal_mean_sigma,
-                decadal_derivative,
-                decadal_derivative_sigma,
+                decadal_mean[var],
+                decadal_mean_sigma[var],
+                decadal_derivative[var],
+                decadal_derivative_sigma[var],
             ],
             axis=1,
             keys=[
@@ -10,118 +10,10 @@ import pandas as pd
 import xarray as xr
 import statsmodels.api as sm
 
-# READING STUFF
-
-def read_hadcrut(input_data_dir, temp_resolution="monthly"):
-    # Read the HadCRUT5 dataset from file
-    hadcrut5 = pd.read_csv(
-        os.path.join(
-            input_data_dir,
-            f"HadCRUT.5.0.2.0.analysis.summary_series.global.{temp_resolution}.csv",
-        ),
-        index_col="Time",
-    )
-
-    # Set the index to datetime
-    if temp_resolution == "monthly":
-        hadcrut5.index = pd.to_datetime(hadcrut5.index).rename("time")
-
-    return hadcrut5
-
-
-def read_noaa_gt(input_data_dir, region):
-    if region == "land_ocean":
-        name = "NOAA-GlobalTemp"
-    elif region == "land":
-        name = "NOAA-GT-Land"
-    # Read the NOAA Global Temperature data
-    noaa_gt = pd.read_csv(
-        os.path.join(
-            input_data_dir,
-            f"NOAAGlobalTemp_aravg_mon_{region}_90S_90N_v6_0_0_202503.asc",
-        ),
-        sep=r"\s+",
-        usecols=range(0, 3),
-        names=["Year", "Month", "Anomaly"],
-        header=None,
-        index_col=0,
-    )
-
-    # Convert the NOAA monthly data to a timeseries
-    noaa_gt = pd.Series(
-        data=noaa_gt["Anomaly"].values,
-        index=pd.date_range(
-            f"{noaa_gt.index[0]}-{noaa_gt.Month.iloc[0]}",
-            f"{noaa_gt.index[-1]}-{noaa_gt.Month.iloc[-1]}",
-            freq="MS",
-        ),
-        name=name,
-    )
-
-    return noaa_gt
-
-
-def read_gistemp_lsat(input_data_dir):
-    def convert_fractional_year_to_datetime(year_fraction):
-        year = int(year_fraction)
-        month_lookup = {0.04:1, 0.13:2, 0.21:3, 0.29:4, 0.38:5, 0.46:6,
-                        0.54:7, 0.63:8, 0.71:9, 0.79:10, 0.88:11, 0.96:12,
-                        }
-        month = month_lookup[round(year_fraction%1, 2)]
-        return pd.to_datetime(f"{year}-{month:02d}")
-
-    gt_land = pd.read_csv(
-        os.path.join(
-            input_data_dir,
-            "gistemp_lsatv4.csv",
-            ),
-        skiprows=1,
-        usecols=[0,3],
-        index_col=0,
-        )
-
-    gt_land.index = pd.Index([convert_fractional_year_to_datetime(t) for t in gt_land.index])
-
-    return gt_land.rename(columns={"Land_Only":"GHCNv4"})
-
-
-def read_berkeley(input_data_dir, landonly=False):
-    if landonly:
-        filename = "BerkeleyEarth_Complete_TAVG_complete.txt"
-        skiprows = 1235
-        name = "BerkeleyEarth-Land"
-    else:
-        filename = "BerkeleyEarth_Land_and_Ocean_complete.txt"
-        skiprows = 86
-        name = "BerkeleyEarth"
-    # Read the Berkeley Earth data
-    berkeley = pd.read_csv(
-        os.path.join(
-            input_data_dir,
-            filename,
-        ),
-        sep=r"\s+",
-        skiprows=skiprows,
-        nrows=2100,
-        usecols=range(0, 3),
-        names=["Year", "Month", "GMST Anomaly"],
-        header=None,
-        index_col=0,
-    )
-
-    # Convert the Berkeley Earth monthly data to a timeseries
-    berkeley = pd.Series(
-        data=berkeley["GMST Anomaly"].values,
-        index=pd.date_range(
-            f"{berkeley.index[0]}-{berkeley.Month.iloc[0]}",
-            f"{berkeley.index[-1]}-{berkeley.Month.iloc[-1]}",
-            freq="MS",
-        ),
-        name=name,
-    )
-
-    return berkeley
+from utils import su7_time_axis as time_axis
+from utils import su10_ingestion as ingestion
 
+# READING STUFF
 
 def read_annual_climtrace(data_dir, var):
     climtrace_annual = pd.read_csv(
@@ -137,12 +29,13 @@ def read_annual_climtrace(data_dir, var):
 
 
 def read_ersst(input_data_dir):
-    ersst = xr.load_dataset(
-        os.path.join(
-            input_data_dir,
-            "timemerge_fldmean_ersst.v5.nc",
+    with ingestion.NETCDF_LOCK:
+        ersst = xr.load_dataset(
+            os.path.join(
+                input_data_dir,
+                "timemerge_fldmean_ersst.v5.nc",
+                )
             )
-        )
 
     ersst = pd.DataFrame(
         data=ersst.sel(lon=0, lat=0, lev=0)["ssta"].values,
@@ -158,12 +51,13 @@ def read_ersst(input_data_dir):
 
 
 def read_iap_sst(input_data_dir):
-    iap_sst = xr.load_dataset(
-        os.path.join(
-            input_data_dir,
-            "fldmean_IAPv4_t1m_1960-2024.nc",
+    with ingestion.NETCDF_LOCK:
+        iap_sst = xr.load_dataset(
+            os.path.join(
+                input_data_dir,
+                "fldmean_IAPv4_t1m_1960-2024.nc",
+                )
             )
-        )
 
     iap_sst = pd.DataFrame(
         data=iap_sst.sel(lon=0, lat=0)["temp"].values,
@@ -182,12 +76,13 @@ def read_era5_data(input_data_dir, metric):
     date = "2025-03-15"
     filename = f"era5_{metric}_monthly_gloavg_{date}.nc"
 
-    era5_data = xr.load_dataarray(
-        os.path.join(
-            input_data_dir,
-            filename,
+    with ingestion.NETCDF_LOCK:
+        era5_data = xr.load_dataarray(
+            os.path.join(
+                input_data_dir,
+                filename,
+                )
             )
-        )
 
     era5_data = pd.DataFrame(
         data=era5_data,
@@ -207,12 +102,13 @@ def read_jra3q_data(input_data_dir, metric):
     # filename = f"fldmean_jra-3q_{metric}_monthly_gloavg_{date}.nc"
     filename = f"jra-3q_{metric}_monthly_gloavg_{date}.nc"
 
-    jra3q_data = xr.load_dataarray(
-        os.path.join(
-            input_data_dir,
-            filename,
+    with ingestion.NETCDF_LOCK:
+        jra3q_data = xr.load_dataarray(
+            os.path.join(
+                input_data_dir,
+                filename,
+                )
             )
-        )
 
     jra3q_data = pd.DataFrame(
         data=jra3q_data,
@@ -227,49 +123,14 @@ def read_jra3q_data(input_data_dir, metric):
     return jra3q_data
 
 
-def read_hadsst(input_data_dir):
-    hadsst = pd.read_csv(
-        os.path.join(
-            input_data_dir,
-            "HadSST.4.0.1.0_monthly_GLOBE.csv",
-            ),
-        usecols=["year", "month", "anomaly"],
-        index_col=[0],
-        )
-
-    hadsst = pd.Series(
-        data=hadsst["anomaly"].values,
-        index=pd.date_range(
-            f"{hadsst.index[0]}-{hadsst.month.iloc[0]}",
-            f"{hadsst.index[-1]}-{hadsst.month.iloc[-1]}",
-            freq="MS",
-        ),
-    )
-
-    return hadsst
-
-
-def read_crutem(input_data_dir):
-    crutem = pd.read_csv(
-        os.path.join(
-            input_data_dir,
-            "CRUTEM.5.0.2.0.summary_series.global.monthly.csv",
-            ),
-        usecols=[0,1],
-        index_col=0,
-        )
-
-    crutem.index = crutem.index.astype("datetime64[ns]")
-    return crutem
-
-
 def read_ghcn_cams(input_data_dir):
-    ghcn_cams = xr.load_dataset(
-        os.path.join(
-            input_data_dir,
-            "fldmean_ghcn_cams_air.mon.mean.nc",
+    with ingestion.NETCDF_LOCK:
+        ghcn_cams = xr.load_dataset(
+            os.path.join(
+                input_data_dir,
+                "fldmean_ghcn_cams_air.mon.mean.nc",
+                )
             )
-        )
 
     ghcn_cams = pd.DataFrame(
         data=ghcn_cams.sel(lon=0, lat=0)["air"].values,
@@ -285,12 +146,13 @@ def read_ghcn_cams(input_data_dir):
 
 
 def read_iap_temperature_depthprofile(input_data_dir):
-    iap_profs = xr.load_dataset(
-        os.path.join(
-            input_data_dir,
-            "fldmean_IAPv4_Temp_anomaly_monthly_1_200m_1960-2024.nc",
-            ),
-        )
+    with ingestion.NETCDF_LOCK:
+        iap_profs = xr.load_dataset(
+            os.path.join(
+                input_data_dir,
+                "fldmean_IAPv4_Temp_anomaly_monthly_1_200m_1960-2024.nc",
+                ),
+            )
 
     iap_profs = pd.DataFrame(
         index=iap_profs.time,
@@ -305,12 +167,13 @@ def read_era5_altitudeprofile(input_data_dir, region=None):
     date = "2025-03-12"
 
     filename = f"era5_temp_on_altitude_monthly_gloavg_{date}_100minterp.nc"
-    era5_profs = xr.load_dataset(
-        os.path.join(
-            input_data_dir,
-            filename,
-            ),
-        )
+    with ingestion.NETCDF_LOCK:
+        era5_profs = xr.load_dataset(
+            os.path.join(
+                input_data_dir,
+                filename,
+                ),
+            )
 
     if not region == None:
         era5_profs = pd.DataFrame(
@@ -359,16 +222,11 @@ def calculate_linear_trends(data, start_year, end_year, window_size=33, conversi
 
 
 def deseasonalize_timeseries(data, reference_period):
-    def seasonal_adjustment(data, annual_cycle):
-        deseasonalized_data = data.copy()
-        for date in data.index:
-            deseasonalized_data.loc[date] = data.loc[date] - annual_cycle.loc[date.month]
-        return deseasonalized_data
-
     reference = data.loc[str(reference_period[0]):str(reference_period[1])]
     annual_cycle = reference.groupby(reference.index.month).mean()
 
-    return seasonal_adjustment(data, annual_cycle)
+    # subtract the annual cycle from all months at once
+    return data - annual_cycle.loc[data.index.month].values
 
 
 # MAIN
@@ -397,25 +255,56 @@ def main():
     start_year = 1991
     end_year = 2023
 
+    # start reading all input files concurrently
+    sst_dir = os.path.join(input_data_dir, "sst")
+    lsat_dir = os.path.join(input_data_dir, "lsat")
+    ssat_dir = os.path.join(input_data_dir, "ssat")
+
+    inputs = {
+        "iap_profiles": (read_iap_temperature_depthprofile, profile_input_data_dir),
+        "era5_profiles": (read_era5_altitudeprofile, profile_input_data_dir),
+        "era5_land_profiles": (read_era5_altitudeprofile, profile_input_data_dir, "land"),
+        "era5_ocean_profiles": (read_era5_altitudeprofile, profile_input_data_dir, "oceans"),
+        "hadcrut5": (ingestion.read_hadcrut, input_data_dir),
+        "climtrace_gmst": (read_annual_climtrace, output_data_dir, "GMST"),
+        "noaa_gt": (ingestion.read_noaa_gt, input_data_dir, "land_ocean"),
+        "berkeley": (ingestion.read_berkeley, input_data_dir),
+        "climtrace_gsat": (read_annual_climtrace, output_data_dir, "GSAT"),
+        "ersst": (read_ersst, sst_dir),
+        "hadsst": (ingestion.read_hadsst, sst_dir),
+        "iap_sst": (read_iap_sst, sst_dir),
+        "crutem": (ingestion.read_crutem, lsat_dir),
+        "gistemp_lsat": (ingestion.read_gistemp_lsat, lsat_dir),
+        "berkeley_lsat": (ingestion.read_berkeley, lsat_dir, True),
+    }
+    for metric in ["gmst_inclsi", "gmst_nosi", "gmst_inclsi_f", "gmst_nosi_f", "gsat"]:
+        inputs[f"era5_{metric}"] = (read_era5_data, input_data_dir, metric)
+        inputs[f"jra3q_{metric}"] = (read_jra3q_data, input_data_dir, metric)
+    for metric, directory in [("sst", sst_dir), ("lsat", lsat_dir), ("ssat", ssat_dir)]:
+        inputs[f"era5_{metric}"] = (read_era5_data, directory, metric)
+        inputs[f"jra3q_{metric}"] = (read_jra3q_data, directory, metric)
+
+    files = ingestion.prefetch(inputs)
+
     # profiles
 
-    iap_profiles = read_iap_temperature_depthprofile(profile_input_data_dir)
-    iap_annual_profiles = iap_profiles.groupby(iap_profiles.index.year).mean()
+    iap_profiles = files["iap_profiles"].result()
+    iap_annual_profiles = time_axis.annual_means(time_axis.complete_years(iap_profiles))
     iap_trend_profile, iap_uncert_profile = calculate_linear_trends(iap_annual_profiles, start_year, end_year, conversion_factor=10)
     iap_trend_profile["average"] = iap_trend_profile.mean(axis=1)
     iap_uncert_profile["average"] = np.sqrt((iap_uncert_profile**2).sum(axis=1)/len(iap_uncert_profile.columns))
 
-    era5_profiles = read_era5_altitudeprofile(profile_input_data_dir)
-    era5_land_profiles = read_era5_altitudeprofile(profile_input_data_dir, "land")
-    era5_ocean_profiles = read_era5_altitudeprofile(profile_input_data_dir, "oceans")
+    era5_profiles = files["era5_profiles"].result()
+    era5_land_profiles = files["era5_land_profiles"].result()
+    era5_ocean_profiles = files["era5_ocean_profiles"].result()
 
     era5_profiles_deseasonalized = deseasonalize_timeseries(era5_profiles, (1991, 2020))
     era5_land_profiles_deseasonalized = deseasonalize_timeseries(era5_land_profiles, (1991, 2020))
     era5_ocean_profiles_deseasonalized = deseasonalize_timeseries(era5_ocean_profiles, (1991, 2020))
 
-    era5_annual_profiles = era5_profiles_deseasonalized.groupby(era5_profiles.index.year).mean()
-    era5_land_annual_profiles = era5_land_profiles_deseasonalized.groupby(era5_land_profiles.index.year).mean()
-    era5_ocean_annual_profiles = era5_ocean_profiles_deseasonalized.groupby(era5_ocean_profiles.index.year).mean()
+    era5_annual_profiles = time_axis.annual_means(time_axis.complete_years(era5_profiles_deseasonalized))
+    era5_land_annual_profiles = time_axis.annual_means(time_axis.complete_years(era5_land_profiles_deseasonalized))
+    era5_ocean_annual_profiles = time_axis.annual_means(time_axis.complete_years(era5_ocean_profiles_deseasonalized))
 
     era5_trend_profile, era5_uncert_profile = calculate_linear_trends(era5_annual_profiles, start_year, end_year, conversion_factor=10)
     era5_trend_profile["average"] = era5_trend_profile.mean(axis=1)
@@ -482,66 +371,66 @@ def main():
     )
 
     # GMST
-    hadcrut5 = read_hadcrut(input_data_dir)
-    climtrace_gmst = read_annual_climtrace(output_data_dir, "GMST")
+    hadcrut5 = files["hadcrut5"].result()
+    climtrace_gmst = files["climtrace_gmst"].result()
 
     gmst_data = pd.DataFrame(index=hadcrut5.index)
 
     gmst_data["HadCRUT5"] = hadcrut5["Anomaly (deg C)"]
 
-    era5_gmst_inclsi = read_era5_data(input_data_dir, "gmst_inclsi")
+    era5_gmst_inclsi = files["era5_gmst_inclsi"].result()
     era5_gmst_inclsi = deseasonalize_timeseries(era5_gmst_inclsi, (1991, 2020))
-    era5_gmst_nosi = read_era5_data(input_data_dir, "gmst_nosi")
+    era5_gmst_nosi = files["era5_gmst_nosi"].result()
     era5_gmst_nosi = deseasonalize_timeseries(era5_gmst_nosi, (1991, 2020))
-    era5_gmst_inclsi_f = read_era5_data(input_data_dir, "gmst_inclsi_f")
+    era5_gmst_inclsi_f = files["era5_gmst_inclsi_f"].result()
     era5_gmst_inclsi_f = deseasonalize_timeseries(era5_gmst_inclsi_f, (1991, 2020))
-    era5_gmst_nosi_f = read_era5_data(input_data_dir, "gmst_nosi_f")
+    era5_gmst_nosi_f = files["era5_gmst_nosi_f"].result()
     era5_gmst_nosi_f = deseasonalize_timeseries(era5_gmst_nosi_f, (1991, 2020))
 
-    jra3q_gmst_inclsi = read_jra3q_data(input_data_dir, "gmst_inclsi")
+    jra3q_gmst_inclsi = files["jra3q_gmst_inclsi"].result()
     jra3q_gmst_inclsi = deseasonalize_timeseries(jra3q_gmst_inclsi, (1991, 2020))
-    jra3q_gmst_nosi = read_jra3q_data(input_data_dir, "gmst_nosi")
+    jra3q_gmst_nosi = files["jra3q_gmst_nosi"].result()
     jra3q_gmst_nosi = deseasonalize_timeseries(jra3q_gmst_nosi, (1991, 2020))
-    jra3q_gmst_inclsi_f = read_jra3q_data(input_data_dir, "gmst_inclsi_f")
+    jra3q_gmst_inclsi_f = files["jra3q_gmst_inclsi_f"].result()
     jra3q_gmst_inclsi_f = deseasonalize_timeseries(jra3q_gmst_inclsi_f, (1991, 2020))
-    jra3q_gmst_nosi_f = read_jra3q_data(input_data_dir, "gmst_nosi_f")
+    jra3q_gmst_nosi_f = files["jra3q_gmst_nosi_f"].result()
     jra3q_gmst_nosi_f = deseasonalize_timeseries(jra3q_gmst_nosi_f, (1991, 2020))
 
     gmst_data = pd.concat([gmst_data, era5_gmst_inclsi, era5_gmst_inclsi_f, era5_gmst_nosi, era5_gmst_nosi_f, jra3q_gmst_inclsi, jra3q_gmst_inclsi_f, jra3q_gmst_nosi, jra3q_gmst_nosi_f], axis=1)
 
-    gmst_data["NOAAGloTemp"] = read_noaa_gt(input_data_dir, "land_ocean")
-    gmst_data["BerkeleyEarth"] = read_berkeley(input_data_dir)
+    gmst_data["NOAAGloTemp"] = files["noaa_gt"].result()
+    gmst_data["BerkeleyEarth"] = files["berkeley"].result()
 
 
-    gmst_annual_average = gmst_data.groupby(gmst_data.index.year).mean()
+    gmst_annual_average = time_axis.annual_means(time_axis.complete_years(gmst_data))
     gmst_annual_average["ClimTrace-GMST"] = climtrace_gmst["ClimTrace_GMST"]
 
     gmst_slopes = calculate_linear_trends(gmst_annual_average, start_year, end_year)
 
     # GSAT
 
-    climtrace_gsat = read_annual_climtrace(output_data_dir, "GSAT")
-    era5_gsat = read_era5_data(input_data_dir, "gsat")
+    climtrace_gsat = files["climtrace_gsat"].result()
+    era5_gsat = files["era5_gsat"].result()
     era5_gsat = deseasonalize_timeseries(era5_gsat, (1991, 2020))
-    jra3q_gsat = read_jra3q_data(input_data_dir, "gsat")
+    jra3q_gsat = files["jra3q_gsat"].result()
     jra3q_gsat = deseasonalize_timeseries(jra3q_gsat, (1991, 2020))
 
     gsat_data = pd.DataFrame(index=era5_gsat.index, data=era5_gsat.values, columns=["ERA5-GSAT"])
 
     gsat_data = pd.concat([gsat_data, jra3q_gsat], axis=1)
 
-    gsat_annual_average = gsat_data.groupby(gsat_data.index.year).mean()
+    gsat_annual_average = time_axis.annual_means(time_axis.complete_years(gsat_data))
     gsat_annual_average["ClimTrace-GSAT"] = climtrace_gsat["ClimTrace_GSAT"]
 
     gsat_slopes = calculate_linear_trends(gsat_annual_average, start_year, end_year)
 
     # SST
-    ersst = read_ersst(os.path.join(input_data_dir, "sst"))
-    hadsst = read_hadsst(os.path.join(input_data_dir, "sst"))
-    era5_sst = read_era5_data(os.path.join(input_data_dir, "sst"), "sst")
+    ersst = files["ersst"].result()
+    hadsst = files["hadsst"].result()
+    era5_sst = files["era5_sst"].result()
     era5_sst = deseasonalize_timeseries(era5_sst, (1991, 2020))
-    iap_sst = read_iap_sst(os.path.join(input_data_dir, "sst"))
-    jra3q_sst = read_jra3q_data(os.path.join(input_data_dir, "sst"), "sst")
+    iap_sst = files["iap_sst"].result()
+    jra3q_sst = files["jra3q_sst"].result()
     jra3q_sst = deseasonalize_timeseries(jra3q_sst, (1991, 2020))
 
     sst_data = pd.DataFrame(index=hadsst.index)
@@ -549,16 +438,16 @@ def main():
     sst_data["HadSST4"] = hadsst.values
     sst_data = pd.concat([sst_data, ersst, era5_sst, iap_sst, jra3q_sst], axis=1)
 
-    sst_annual_average = sst_data.groupby(sst_data.index.year).mean()
+    sst_annual_average = time_axis.annual_means(time_axis.complete_years(sst_data))
     sst_slopes = calculate_linear_trends(sst_annual_average, start_year, end_year)
 
     # LSAT
-    crutem = read_crutem(os.path.join(input_data_dir, "lsat"))
-    gt_land = read_gistemp_lsat(os.path.join(input_data_dir, "lsat"))
-    berkeley_lsat = read_berkeley(os.path.join(input_data_dir, "lsat"), landonly=True)
-    era5_lsat = read_era5_data(os.path.join(input_data_dir, "lsat"), "lsat")
+    crutem = files["crutem"].result()
+    gt_land = files["gistemp_lsat"].result()
+    berkeley_lsat = files["berkeley_lsat"].result()
+    era5_lsat = files["era5_lsat"].result()
     era5_lsat = deseasonalize_timeseries(era5_lsat, (1991, 2020))
-    jra3q_lsat = read_jra3q_data(os.path.join(input_data_dir, "lsat"), "lsat")
+    jra3q_lsat = files["jra3q_lsat"].result()
     jra3q_lsat = deseasonalize_timeseries(jra3q_lsat, (1991, 2020))
 
     lsat_data = pd.DataFrame(index=crutem.index)
@@ -566,7 +455,7 @@ def main():
 
     lsat_data = pd.concat([lsat_data, gt_land, berkeley_lsat, era5_lsat, jra3q_lsat,], axis=1)
 
-    lsat_annual_average = lsat_data.groupby(lsat_data.index.year).mean()
+    lsat_annual_average = time_axis.annual_means(time_axis.complete_years(lsat_data))
     lsat_slopes = calculate_linear_trends(lsat_annual_average, start_year, end_year)
 
     # ## TEMPORARY: DIAGNOSTIC PLOT ##
@@ -620,14 +509,14 @@ def main():
     # plt.show()
 
     # SSAT
-    era5_ssat = read_era5_data(os.path.join(input_data_dir, "ssat"), "ssat")
-    jra3q_ssat = read_jra3q_data(os.path.join(input_data_dir, "ssat"), "ssat")
+    era5_ssat = files["era5_ssat"].result()
+    jra3q_ssat = files["jra3q_ssat"].result()
 
     ssat_data = pd.DataFrame(index=era5_ssat.index)
     ssat_data["ERA5-SSAT"] = era5_ssat.values
     ssat_data = pd.concat([ssat_data, jra3q_ssat], axis=1)
 
-    ssat_annual_average = ssat_data.groupby(ssat_data.index.year).mean()
+    ssat_annual_average = time_axis.annual_means(time_axis.complete_years(ssat_data))
     ssat_slopes = calculate_linear_trends(ssat_annual_average, start_year, end_year)
 
     # combine and save
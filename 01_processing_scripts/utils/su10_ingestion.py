@@ -0,0 +1,275 @@
+import os
+import io
+import re
+import threading
+import concurrent.futures
+import numpy as np
+import pandas as pd
+from . import su6_cache as cache
+from . import su7_time_axis as time_axis
+
+
+# Readers of the raw surface-temperature text and CSV files. Each file
+# is parsed once into a typed float frame and kept in the memory and
+# disk cache of su6_cache (keyed on the file and the parse options), so
+# later runs of the processing scripts skip the text parsing.
+
+
+# Layouts of the whitespace-separated text tables. Data lines are found
+# by the regular expression "data" instead of line counts, so files that
+# grow by a month need no changes here:
+#   data:    pattern matching the beginning of a data line
+#   block:   which block of consecutive data lines to read (0: first)
+#   fields:  names of the leading fields of a line; missing trailing
+#            fields of short lines are NaN
+#   missing: values that denote missing data
+FORMATS = {
+    # Berkeley Earth: "%" header, blocks of year, month, anomaly, ...
+    "berkeley": {
+        "data": r"\s*-?\d{4}\s+\d{1,2}\s",
+        "block": 0,
+        "fields": ["Year", "Month", "Anomaly"],
+        "missing": ["NaN"],
+    },
+    # NOAAGlobalTemp .asc: year, month, anomaly, -999 filled statistics
+    "noaa_gt": {
+        "data": r"\s*\d{4}\s+\d{1,2}\s",
+        "block": 0,
+        "fields": ["Year", "Month", "Anomaly"],
+        "missing": [-999.0],
+    },
+    # NOAA PSL tables: year and 12 monthly values, text header and footer
+    "psl_table": {
+        "data": r"\s*\d{4}(\s+\S+){2,}",
+        "block": 0,
+        "fields": ["Year"] + list(range(1, 13)),
+        "missing": [-99.99],
+    },
+}
+
+
+# PARSING
+
+def parse_fixed_format(path, layout):
+    """DataFrame of the fields of the data lines of the text table
+    `path`, described by the FORMATS entry `layout`. The selected lines
+    are parsed in bulk by the C parser of pandas."""
+    spec = FORMATS[layout]
+
+    with open(path, "rb") as f:
+        lines = f.read().splitlines()
+
+    pattern = re.compile(spec["data"].encode())
+    is_data = np.array([pattern.match(line) is not None for line in lines])
+
+    # number the blocks of consecutive data lines
+    starts = is_data & ~np.concatenate([[False], is_data[:-1]])
+    block = np.cumsum(starts) - 1
+    selected = np.flatnonzero(is_data & (block == spec["block"]))
+
+    return pd.read_csv(
+        io.BytesIO(b"\n".join([lines[i] for i in selected])),
+        sep=r"\s+",
+        header=None,
+        names=spec["fields"],
+        usecols=range(len(spec["fields"])),
+        na_values=spec["missing"],
+        engine="c",
+    )
+
+
+def monthly_series(
+    years, months, values, name=None, start=None, end=None
+):
+    """Series of monthly values at the given `years` and `months`,
+    optionally restricted to the months `start` to `end`."""
+    numbers = np.asarray(years) * 12 + np.asarray(months) - 1
+
+    keep = np.ones(len(numbers), dtype=bool)
+    if start is not None:
+        keep &= numbers >= time_axis.month_number(start)
+    if end is not None:
+        keep &= numbers <= time_axis.month_number(end)
+
+    return pd.Series(
+        data=np.asarray(values)[keep],
+        index=time_axis.month_starts(numbers[keep]),
+        name=name,
+    )
+
+
+def parse_hadcrut(path, temp_resolution="monthly"):
+    """HadCRUT5 summary series (anomaly and confidence limits)."""
+    hadcrut5 = pd.read_csv(path, index_col="Time")
+
+    if temp_resolution == "monthly":
+        hadcrut5.index = pd.to_datetime(hadcrut5.index).rename("time")
+
+    return hadcrut5
+
+
+def parse_noaa_gt(path, name=None):
+    """NOAAGlobalTemp monthly anomalies from its .asc table."""
+    noaa_gt = parse_fixed_format(path, "noaa_gt")
+
+    return monthly_series(
+        noaa_gt["Year"].values,
+        noaa_gt["Month"].values,
+        noaa_gt["Anomaly"].values,
+        name,
+    )
+
+
+def parse_berkeley(path, name=None, start=None, end=None):
+    """Berkeley Earth monthly anomalies from the first table of its text
+    file, optionally restricted to the months `start` to `end`."""
+    berkeley = parse_fixed_format(path, "berkeley")
+
+    return monthly_series(
+        berkeley["Year"].values,
+        berkeley["Month"].values,
+        berkeley["Anomaly"].values,
+        name,
+        start,
+        end,
+    )
+
+
+def parse_gistemp_lsat(path):
+    """GISTEMP land-only (GHCNv4) monthly anomalies."""
+    gt_land = pd.read_csv(path, skiprows=1, usecols=[0, 3], index_col=0)
+
+    # mid-month fractional years to month starts
+    gt_land.index = time_axis.month_starts(
+        time_axis.fractional_year_months(gt_land.index)
+    )
+
+    return gt_land.rename(columns={"Land_Only": "GHCNv4"})
+
+
+def parse_hadsst(path):
+    """HadSST4 global monthly anomalies."""
+    hadsst = pd.read_csv(path, usecols=["year", "month", "anomaly"])
+
+    return monthly_series(
+        hadsst["year"].values,
+        hadsst["month"].values,
+        hadsst["anomaly"].values,
+    )
+
+
+def parse_crutem(path):
+    """CRUTEM5 global monthly anomalies."""
+    crutem = pd.read_csv(path, usecols=[0, 1], index_col=0)
+    crutem.index = crutem.index.astype("datetime64[ns]")
+
+    return crutem
+
+
+# READING
+
+def read_hadcrut(input_data_dir, temp_resolution="monthly"):
+    """HadCRUT5 global "monthly" or "annual" summary series."""
+    return cache.cached(
+        os.path.join(
+            input_data_dir,
+            "HadCRUT.5.0.2.0.analysis.summary_series.global."
+            f"{temp_resolution}.csv",
+        ),
+        parse_hadcrut,
+        temp_resolution=temp_resolution,
+    )
+
+
+def read_noaa_gt(input_data_dir, region="land_ocean"):
+    """NOAAGlobalTemp monthly "land_ocean" or "land" anomalies."""
+    if region == "land_ocean":
+        name = "NOAA-GlobalTemp"
+    elif region == "land":
+        name = "NOAA-GT-Land"
+    else:
+        raise KeyError(f"read_noaa_gt: unknown region {region}.")
+
+    return cache.cached(
+        os.path.join(
+            input_data_dir,
+            f"NOAAGlobalTemp_aravg_mon_{region}_90S_90N_v6_0_0_202503.asc",
+        ),
+        parse_noaa_gt,
+        spec=FORMATS["noaa_gt"],
+        name=name,
+    )
+
+
+def read_berkeley(input_data_dir, landonly=False, end=None):
+    """Berkeley Earth monthly land-and-ocean (or land-only) anomalies
+    from 1850 until the month `end` (default: all)."""
+    if landonly:
+        filename = "BerkeleyEarth_Complete_TAVG_complete.txt"
+        name = "BerkeleyEarth-Land"
+    else:
+        filename = "BerkeleyEarth_Land_and_Ocean_complete.txt"
+        name = "BerkeleyEarth"
+
+    return cache.cached(
+        os.path.join(input_data_dir, filename),
+        parse_berkeley,
+        spec=FORMATS["berkeley"],
+        name=name,
+        start="1850-01",
+        end=end,
+    )
+
+
+def read_gistemp_lsat(input_data_dir):
+    """GISTEMP land-only monthly anomalies."""
+    return cache.cached(
+        os.path.join(input_data_dir, "gistemp_lsatv4.csv"),
+        parse_gistemp_lsat,
+    )
+
+
+def read_hadsst(input_data_dir):
+    """HadSST4 global monthly anomalies."""
+    return cache.cached(
+        os.path.join(input_data_dir, "HadSST.4.0.1.0_monthly_GLOBE.csv"),
+        parse_hadsst,
+    )
+
+
+def read_crutem(input_data_dir):
+    """CRUTEM5 global monthly anomalies."""
+    return cache.cached(
+        os.path.join(
+            input_data_dir,
+            "CRUTEM.5.0.2.0.summary_series.global.monthly.csv",
+        ),
+        parse_crutem,
+    )
+
+
+# PREFETCHING
+
+# The HDF5 library under netCDF4 is usually built without thread safety,
+# so readers hold this lock while opening netCDF files; text files are
+# parsed concurrently meanwhile.
+NETCDF_LOCK = threading.Lock()
+
+
+def prefetch(inputs, n_workers=None):
+    """Starts reading all `inputs`, a dict of name: (reader, *args), in a
+    thread pool of `n_workers` threads (default: that of
+    ThreadPoolExecutor). File I/O and the pandas parser release the GIL,
+    so the files load concurrently; netCDF readers must hold
+    NETCDF_LOCK.
+
+    Returns a dict of name: Future; its result() is the reader's result.
+    """
+    pool = concurrent.futures.ThreadPoolExecutor(n_workers)
+    futures = {
+        name: pool.submit(reader, *args)
+        for name, (reader, *args) in inputs.items()
+    }
+    pool.shutdown(wait=False)
+
+    return futures
@@ -0,0 +1,153 @@
+import os
+import functools
+import numpy as np
+import pandas as pd
+from . import su7_time_axis as time_axis
+from . import su10_ingestion as ingestion
+
+
+# An ensemble is configured as a list of members, each a dict of
+#   name:      column name of the member
+#   reader:    reader function, or the name of one in su10_ingestion,
+#              called with the input directory (plus "subdir")
+#   kwargs:    further keyword arguments of the reader (optional)
+#   subdir:    subdirectory of the input directory (optional)
+#   variable:  column to use if the reader returns a DataFrame
+#              (optional, default: the first)
+#   alignment: first and last year of the period each member is
+#              aligned on (optional, default: 1951-1980)
+# The first member defines the monthly time axis of the ensemble, which
+# ends in the last month covered by all members.
+ALIGNMENT_PERIOD = (1951, 1980)
+
+
+def read_members(members, input_data_dir, n_workers=None):
+    """Monthly Series of all `members`, read concurrently by
+    `n_workers` threads (see su10_ingestion.prefetch), as a dict of
+    name: Series in the order of `members`."""
+    inputs = {}
+    for member in members:
+        reader = member["reader"]
+        if isinstance(reader, str):
+            reader = getattr(ingestion, reader)
+
+        inputs[member["name"]] = (
+            functools.partial(reader, **member.get("kwargs", {})),
+            os.path.join(input_data_dir, member.get("subdir", "")),
+        )
+
+    futures = ingestion.prefetch(inputs, n_workers)
+
+    series = {}
+    for member in members:
+        data = futures[member["name"]].result()
+        if isinstance(data, pd.DataFrame):
+            data = data[member.get("variable", data.columns[0])]
+        series[member["name"]] = data
+
+    return series
+
+
+def monthly_ensemble(
+    members,
+    input_data_dir,
+    name="ClimTrace_GMST",
+    reference_period=(1850, 1900),
+    n_workers=None,
+):
+    """Monthly anomalies of the ensemble `members` (see above) and their
+    mean `name`, relative to the mean of `name` over the years
+    `reference_period`, for the complete years of the time axis until
+    the common last month of the members.
+
+    The members are reshaped into one monthly block (see
+    su7_time_axis.monthly_block), each aligned on its own period, and
+    the ensemble mean and reference are computed on the block at once.
+    """
+    series = read_members(members, input_data_dir, n_workers)
+    names = [member["name"] for member in members]
+
+    # all members on month numbers, on the months of the first member
+    # until the common last month of the members
+    data = pd.concat(
+        [
+            pd.Series(
+                index=time_axis.month_numbers(series[n].index),
+                data=np.asarray(series[n].values, dtype=float),
+                name=n,
+            )
+            for n in names
+        ],
+        axis=1,
+    )
+    end = min(data[n].dropna().index[-1] for n in names)
+    axis = time_axis.month_numbers(series[names[0]].index)
+    data = data.loc[axis[axis <= end]]
+    data.index = time_axis.month_starts(data.index).rename(
+        series[names[0]].index.name
+    )
+
+    years, block, present = time_axis.monthly_block(data)
+
+    # align each member on its period
+    for j, member in enumerate(members):
+        start_year, end_year = member.get("alignment", ALIGNMENT_PERIOD)
+        block[:, :, j] -= time_axis.period_mean(
+            years, block[:, :, j], start_year, end_year
+        )
+
+    # ensemble mean, and reference to its mean in the reference period
+    mean = time_axis.nan_mean(block, axis=2)
+    block = np.concatenate([block, mean[:, :, np.newaxis]], axis=2)
+    block -= time_axis.period_mean(years, mean, *reference_period)
+
+    ensemble = pd.DataFrame(
+        index=data.index,
+        columns=names + [name],
+        data=block[present],
+    )
+
+    return time_axis.complete_years(ensemble)
+
+
+def ensemble_spread(annual, name, start_year, end_year):
+    """Standard deviation of the annual deviations of all members from
+    the ensemble mean `name` (the other columns of `annual`) in the
+    years `start_year` to `end_year`."""
+    return (
+        annual.drop(columns=name)
+        .subtract(annual[name], axis=0)
+        .loc[start_year:end_year]
+        .values.std()
+    )
+
+
+def calculate_climtrace_uncertainty(
+    hadcrut_sigma, ensemble_spread, earliest_ensemble_spread
+):
+
+    # account for ensemble spread
+    climtrace_sigma = np.sqrt(hadcrut_sigma**2 + ensemble_spread**2)
+
+    # account for larger spread and uncertainty in very early period
+    climtrace_sigma.loc[1850:1857] = earliest_ensemble_spread
+
+    # linearly relax larger uncertainty constraint
+    slp = (climtrace_sigma.loc[1857] - climtrace_sigma.loc[1864]) / (
+        1857 - 1864
+    )
+    for i, y in enumerate(climtrace_sigma.loc[1857:1864].index):
+        climtrace_sigma.loc[y] = climtrace_sigma.loc[1857] + i * slp
+
+    return climtrace_sigma
+
+
+def ensemble_uncertainty(base_sigma, annual, name):
+    """1-sigma uncertainty of the annual ensemble mean `name`: the
+    uncertainty `base_sigma` combined with the 1951-1980 spread of the
+    members in `annual`, and their 1850-1864 spread early on."""
+    return calculate_climtrace_uncertainty(
+        base_sigma,
+        ensemble_spread(annual, name, 1951, 1980),
+        ensemble_spread(annual, name, 1850, 1864),
+    )
@@ -0,0 +1,42 @@
+import os
+import concurrent.futures
+import numpy as np
+
+
+def worker_count(n_workers=None):
+    """Number of worker processes to use: `n_workers`, or all cores if
+    it is None."""
+    if n_workers is None:
+        return os.cpu_count()
+    return n_workers
+
+
+def chunk_sizes(n_total, chunk_size):
+    """Sizes of the chunks of at most `chunk_size` that `n_total` draws
+    are split into."""
+    return [
+        min(chunk_size, n_total - start)
+        for start in range(0, n_total, chunk_size)
+    ]
+
+
+def run_chunks(function, tasks, n_workers=None, seed=None):
+    """Calls `function(*task)` for each argument tuple in `tasks` and
+    returns the results in the order of the tasks.
+
+    The tasks run on a process pool of `n_workers` (default: all cores;
+    1 runs in this process). If a `seed` is given, each task is passed
+    its own random stream spawned from it as the last argument, so the
+    results do not depend on the number of workers.
+    """
+    if seed is not None:
+        seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+        tasks = [tuple(task) + (s,) for task, s in zip(tasks, seeds)]
+
+    n_workers = worker_count(n_workers)
+
+    if n_workers == 1 or len(tasks) == 1:
+        return [function(*task) for task in tasks]
+
+    with concurrent.futures.ProcessPoolExecutor(n_workers) as pool:
+        return list(pool.map(function, *zip(*tasks)))
@@ -1,112 +1,294 @@
 import math
+import functools
 import pandas as pd
 import numpy as np
-import statsmodels.api as sm
+from numpy.lib.stride_tricks import sliding_window_view
+from . import su5_instrumentation as instr
+from . import su7_time_axis as time_axis
 
 
-def calculate_weighted_least_squares(y, x, weights):
-    """Perform weighted least squares regression."""
-    x_with_constant = sm.add_constant(x)
-    model = sm.WLS(y, x_with_constant, weights=weights).fit()
-    return model
+def weighted_window_moments(values, offset=None):
+    """Prefix sums of the moments needed for closed-form weighted linear
+    fits over arbitrary windows of `values` (along the first axis).
 
+    Missing values are set to zero in the sums and counted separately,
+    so that windows containing them can be flagged afterwards.
+    """
+    values = np.asarray(values, dtype=float)
+
+    # demeaning does not change slopes or residuals, but keeps the
+    # cumulative sums small and the differences of them accurate
+    if offset is None:
+        offset = np.nanmean(values, axis=0)
+
+    empty = {
+        "y": np.zeros((0,) + values.shape[1:]),
+        "offset": offset,
+        "n_missing": np.zeros((1,) + values.shape[1:]),
+        "sum_y": np.zeros((1,) + values.shape[1:]),
+        "sum_ty": np.zeros((1,) + values.shape[1:]),
+        "sum_yy": np.zeros((1,) + values.shape[1:]),
+    }
+
+    return update_window_moments(empty, values, 0)
+
+
+def update_window_moments(moments, values, start):
+    """Prefix sums for `values` that agree with the series behind
+    `moments` before position `start`, e.g. after appending or revising
+    the most recent years. Only the sums from `start` on are recomputed.
+    """
+    values = np.asarray(values, dtype=float)[start:]
+    pos = np.arange(start, start + values.shape[0], dtype=float).reshape(
+        (-1,) + (1,) * (values.ndim - 1)
+    )
+
+    missing = np.isnan(values)
+    y = np.where(missing, 0.0, values - moments["offset"])
+
+    def prefix_sum(key, a):
+        return np.concatenate(
+            [
+                moments[key][: start + 1],
+                moments[key][start] + np.cumsum(a, axis=0),
+            ]
+        )
+
+    return {
+        "y": np.concatenate([moments["y"][:start], y]),
+        "offset": moments["offset"],
+        "n_missing": prefix_sum("n_missing", missing.astype(float)),
+        "sum_y": prefix_sum("sum_y", y),
+        "sum_ty": prefix_sum("sum_ty", pos * y),
+        "sum_yy": prefix_sum("sum_yy", y * y),
+    }
+
+
+def window_linear_fits(moments, length, starts=None):
+    """Weighted linear fits of windows of a given length that lie fully
+    within the data, from prefix sums of weighted moments.
+
+    Odd window lengths use unit weights. For even lengths there is no
+    precise center year, so the next largest odd window is used with
+    half-weighted edge years. The x-axis is centered on the window,
+    hence sum(w*x) vanishes and the normal equations decouple.
+
+    Returns intercept, slope and their standard errors (as in
+    statsmodels' WLS) for the windows beginning at positions `starts`
+    (default: all windows, i.e. centers delta, ..., n-1-delta), and delta.
+    """
+    n = moments["y"].shape[0]
+    delta = int(length) // 2
+    n_obs = 2 * delta + 1
+
+    if starts is None:
+        starts = np.arange(0, n - 2 * delta)
+    lo = np.asarray(starts)
+    hi = lo + n_obs
+    centers = (lo + delta).reshape((-1,) + (1,) * (moments["y"].ndim - 1))
+
+    instr.count_fits(lo.size * math.prod(moments["y"].shape[1:]))
+
+    def window_sum(key):
+        return moments[key][hi] - moments[key][lo]
+
+    sum_y = window_sum("sum_y")
+    sum_xy = window_sum("sum_ty") - centers * sum_y
+    sum_yy = window_sum("sum_yy")
+
+    sum_w = float(n_obs)
+    sum_xx = delta * (delta + 1) * (2 * delta + 1) / 3
+
+    if length % 2 == 0:
+        y_first = moments["y"][lo]
+        y_last = moments["y"][hi - 1]
+        sum_y = sum_y - 0.5 * (y_first + y_last)
+        sum_xy = sum_xy - 0.5 * delta * (y_last - y_first)
+        sum_yy = sum_yy - 0.5 * (y_first**2 + y_last**2)
+        sum_w -= 1
+        sum_xx -= delta**2
+
+    const = sum_y / sum_w
+    slope = sum_xy / sum_xx
+
+    ssr = np.maximum(sum_yy - const * sum_y - slope * sum_xy, 0.0)
+    scale = ssr / (n_obs - 2)
+    bse_const = np.sqrt(scale / sum_w)
+    bse_slope = np.sqrt(scale / sum_xx)
+
+    const = const + moments["offset"]
+
+    incomplete = window_sum("n_missing") > 0
+    if incomplete.any():
+        const, slope, bse_const, bse_slope = (
+            np.where(incomplete, np.nan, a)
+            for a in (const, slope, bse_const, bse_slope)
+        )
+
+    return const, slope, bse_const, bse_slope, delta
+
+
+def eot_filter_values(moments, coreWW, WWrange, start=0):
+    """Array form of eot_filter on the series behind `moments` (years
+    along the first axis), for the center positions from `start` on."""
+
+    deriv_lengths = np.arange(coreWW - WWrange, coreWW + WWrange + 1, 1)
+    central = deriv_lengths[len(deriv_lengths) // 2]
+
+    n = moments["y"].shape[0]
+    pos = np.arange(start, n)
+    shape = (-1,) + (1,) * (moments["y"].ndim - 1)
+
+    # running sums over the window lengths, so that memory does not grow
+    # with the number of fits (73 lengths per center in the monthly mode)
+    anom = 0
+    anom_unc = 0
+    deriv_var = 0
+
+    for l in deriv_lengths:
+        # if the window is not fully within the data range, apply special
+        # index-shift treatment for marginal years: use the nearest
+        # window that fits and evaluate its trendline at the center year.
+        delta = l // 2
+        j = np.clip(pos, delta, n - 1 - delta)
+
+        const, slope, bse_const, bse_slope, _ = window_linear_fits(
+            moments, l, starts=j - delta
+        )
+
+        anom = anom + (const + (pos - j).reshape(shape) * slope)
 
-def eot_filter(series, coreWW, WWrange):
+        anom_unc = anom_unc + np.sqrt(
+            bse_slope**2 * (delta + 1) ** 2 + bse_const**2
+        )
+
+        deriv_var = deriv_var + bse_slope**2
+
+        if l == central:
+            slopes = slope
+
+    inner = (pos >= math.floor(central / 2)) & (
+        pos <= n - 1 - math.floor(central / 2)
+    )
+    inner = inner.reshape(shape)
+
+    anom = anom / len(deriv_lengths)
+    anom_unc = anom_unc / len(deriv_lengths)
+    derivs = np.where(inner, slopes, np.nan)
+    deriv_unc = np.where(
+        inner,
+        np.sqrt(1 / len(deriv_lengths) * deriv_var),
+        np.nan,
+    )
+
+    return anom, derivs, anom_unc, deriv_unc
+
+
+def eot_filter(series, coreWW, WWrange, moments=None, start=0):
     """Calculates a number of linear fits for each center year,
     then returns the average value of the linear fits at that
     center year. The linear fits differ only in range.
+
+    `series` may be a Series or a DataFrame (years x members), in
+    which case all columns are filtered at once. Precomputed `moments`
+    of the series may be passed; with `start`, only the center years
+    from that position on are computed.
     """
+    if moments is None:
+        moments = weighted_window_moments(series.values)
+
+    def like_input(data):
+        if series.ndim == 2:
+            return pd.DataFrame(
+                index=series.index[start:],
+                columns=series.columns,
+                data=data,
+                dtype=float,
+            )
+        return pd.Series(index=series.index[start:], data=data, dtype=float)
 
-    deriv_lengths = np.arange(coreWW - WWrange, coreWW + WWrange + 1, 1)
-    derivs = pd.Series(index=series.index, dtype=float)
-    anom = pd.Series(index=series.index, dtype=float)
-    anom_unc = pd.Series(index=series.index, dtype=float)
-    deriv_unc = pd.Series(index=series.index, dtype=float)
+    return tuple(
+        like_input(result)
+        for result in eot_filter_values(moments, coreWW, WWrange, start)
+    )
 
-    central = deriv_lengths[len(deriv_lengths) // 2]
 
-    for i in series.index:
-        slopes = {}
-        anom_bse = []
-        deriv_bse = []
-        intercepts = {}
-        cyrXs = []
-        for l in deriv_lengths:
-            # if window width is even, there is no precise center year;
-            # these cases are handled by using the next largest odd window
-            # width and half-weighting the edge-years
-            if l % 2 == 1:
-                delta = (l - 1) / 2
-                weights = np.ones(l)
-            else:
-                delta = l / 2
-                weights = np.ones(l + 1)
-                weights[0] = 0.5
-                weights[-1] = 0.5
-
-            # if the window is not fully within the data range, apply special
-            # index-shift treatment for marginal years.
-            if (i - delta >= series.index[0]) and (i + delta <= series.index[-1]):
-                y = series.loc[i - delta : i + delta]
-                x = np.arange(-len(y.index) // 2 + 1, len(y.index) // 2 + 1)
-                res = calculate_weighted_least_squares(y, x, weights)
-                intercepts[l] = res.params.const
-                cyrXs.append(res.params.const)
-            elif i - delta < series.index[0]:
-                j = i + (series.index[0] - (i - delta))
-                y = series.loc[j - delta : j + delta]
-                x = np.arange(-len(y.index) // 2 + 1, len(y.index) // 2 + 1)
-                res = calculate_weighted_least_squares(y, x, weights)
-                cyrXs.append(res.params.const + (i - j) * res.params.x1)
-            else:
-                j = i - ((i + delta) - series.index[-1])
-                y = series.loc[j - delta : j + delta]
-                x = np.arange(-len(y.index) // 2 + 1, len(y.index) // 2 + 1)
-                res = calculate_weighted_least_squares(y, x, weights)
-                cyrXs.append(res.params.const + (i - j) * res.params.x1)
-
-            slopes[l] = res.params.x1
-
-            anom_bse.append(
-                np.sqrt(
-                    res.bse.x1**2 * (math.ceil(len(x) * 1 / 2)) ** 2
-                    + res.bse.const**2
-                )
-            )
+def as_member_frame(data, years=None, columns=None):
+    """Returns `data` as a float DataFrame with years as index and
+    ensemble members (datasets, realizations, ...) as columns."""
+    if isinstance(data, pd.DataFrame):
+        return data.astype(float)
+    if isinstance(data, pd.Series):
+        return data.to_frame().astype(float)
+
+    data = np.asarray(data, dtype=float)
+    if data.ndim == 1:
+        data = data[:, np.newaxis]
+    if years is None:
+        raise ValueError(
+            "as_member_frame: 'years' must be given for array input."
+        )
 
-            deriv_bse.append(res.bse.x1)
+    return pd.DataFrame(
+        index=pd.Index(np.asarray(years), dtype=int),
+        columns=columns,
+        data=data,
+    )
 
-        anom.loc[i] = sum(cyrXs) / len(cyrXs)
-        anom_unc[i] = sum(anom_bse) / len(anom_bse)
 
-        if i >= series.index[0] + math.floor(central / 2) and i <= series.index[
-            -1
-        ] - math.floor(central / 2):
-            deriv_unc[i] = np.sqrt(1/len(deriv_bse) * sum([d**2 for d in deriv_bse]))
-            derivs.loc[i] = slopes[central]
-        else:
-            derivs.loc[i] = np.nan
-            deriv_unc.loc[i] = np.nan
+def boxcar_filter(values, halfwidth):
+    """Centered moving-boxcar mean along the first axis; margin years
+    without a full window of valid values keep their unfiltered values."""
+    values = np.asarray(values, dtype=float)
+    width = halfwidth * 2 + 1
+    if values.shape[0] < width:
+        return values.copy()
 
-    return anom, derivs, anom_unc, deriv_unc
+    means = sliding_window_view(values, width, axis=0).mean(axis=-1)
 
+    filtered = values.copy()
+    inner = filtered[halfwidth : values.shape[0] - halfwidth]
+    np.copyto(inner, means, where=~np.isnan(means))
 
-def mw_eot_smoother(
-    ts,
-    ts_unc,
+    return filtered
+
+
+def year_slice(first_year, start, end):
+    """Positions of the years `start` to `end` (inclusive) in arrays
+    beginning with `first_year`, as a slice clipped at the start."""
+    return slice(max(start - first_year, 0), max(end - first_year + 1, 0))
+
+
+def resized(values, n):
+    """`values` cut or NaN-padded along the first axis to length `n`,
+    like a reindex to a range of years with the same first year."""
+    if values.shape[0] >= n:
+        return values[:n].copy()
+    padding = np.full((n - values.shape[0],) + values.shape[1:], np.nan)
+    return np.concatenate([values, padding])
+
+
+def mw_eot_parameters(
+    first_year,
     nStart=1960,
     nEnd=2023,
     mInnerHW=8,
     mOuterHW=11,
     nFlattertrendsStart=2019,
     nDataEnd=2023,
+    nCXokStart=1971,
+    mFadeout=5,
 ):
+    """Window widths and year ranges of the MW-EOT algorithm for input
+    data beginning in `first_year`.
 
-    ##############
-    # PARAMETERS #
-    ##############
+    The curvature is considered reliable from `nCXokStart` on, and the
+    mean curvature fades out over `mFadeout` years after the start of
+    the flatter trends. All years and widths are time steps, i.e. months
+    in the monthly mode.
+    """
 
-    nDataStart = min(ts.index[0], nStart)
+    nDataStart = min(first_year, nStart)
     mCoreHW = (mOuterHW + mInnerHW) / 2
     mCoreHWYrs = math.ceil(mCoreHW)
 
@@ -125,161 +307,666 @@ def mw_eot_smoother(
     nCoreyearsStart = nFilterStart + mCoreHWYrs
     nCoreyearsEnd = nFilterEnd - mCoreHWYrs
 
+    # first year of the data within the filter range
+    nFilterFirstYear = max(nFilterStart, first_year)
+
+    return {
+        "first_year": first_year,
+        "nStart": nStart,
+        "nEnd": nEnd,
+        "mInnerHW": mInnerHW,
+        "mOuterHW": mOuterHW,
+        "nFlattertrendsStart": nFlattertrendsStart,
+        "nDataEnd": nDataEnd,
+        "nCXokStart": nCXokStart,
+        "mFadeout": mFadeout,
+        "mInnerFW": mInnerFW,
+        "mCoreFW": mCoreFW,
+        "N_Trendfits": N_Trendfits,
+        "mXjitterfilterHW": mXjitterfilterHW,
+        "mDXjitterfilterHW": mDXjitterfilterHW,
+        "nFilterStart": nFilterStart,
+        "nFilterEnd": nFilterEnd,
+        "nFilterFirstYear": nFilterFirstYear,
+        "nCoreyearsStart": nCoreyearsStart,
+        "nCoreyearsEnd": nCoreyearsEnd,
+    }
+
+
+def member_frames(ts, ts_unc, years=None):
+    """Member DataFrames of the input series and their uncertainties;
+    a single uncertainty series is applied to all members."""
+    ts = as_member_frame(ts, years=years)
+    if np.ndim(ts_unc) == 1:
+        ts_unc = as_member_frame(ts_unc, years=ts.index)
+        ts_unc = pd.DataFrame(
+            index=ts_unc.index,
+            columns=ts.columns,
+            data=np.repeat(ts_unc.values, len(ts.columns), axis=1),
+        )
+    else:
+        ts_unc = as_member_frame(ts_unc, years=ts.index, columns=ts.columns)
+
+    return ts, ts_unc
+
+
+def mw_eot_trendfits(ts, ts_unc, params):
+    """Steps 1 and 2 of the MW-EOT algorithm: ensemble-of-trendlines
+    fits for the smoothed series X and its uncertainty, and the single
+    core-window fits for the trend rate DX.
+
+    `ts` and `ts_unc` are arrays (years x members) covering the filter
+    years. Returns a dict of the intermediate arrays, together with the
+    prefix sums of the fitted series.
+    """
+    mCoreFW = params["mCoreFW"]
+    mInnerFW = params["mInnerFW"]
+    mXjitterfilterHW = params["mXjitterfilterHW"]
+
+    mark = instr.step_timer("mw_eot_trendfits")
+
     ##########
     # STEP 1 #
     ##########
 
-    ts = ts.loc[nFilterStart:nFilterEnd]
-    ts_unc = ts_unc.loc[nFilterStart:nFilterEnd]
+    mark("STEP 1")
+    ts_moments = weighted_window_moments(ts)
 
     # run EOT-Filter
-    X, _, X_se, DX_se = eot_filter(
-        ts, mCoreFW, (mCoreFW - mInnerFW)
+    X, _, X_se, DX_se = eot_filter_values(
+        ts_moments, mCoreFW, (mCoreFW - mInnerFW)
     )
 
     # Combine EOT-uncertainty with Obs.-Uncertainty
     X_se = np.sqrt(X_se**2 + ts_unc**2)
 
     # Apply additional moving-boxcar noise filter
-    X.update(X.rolling(window=(mXjitterfilterHW * 2 + 1), center=True).mean())
-    X_se.update(
-        X_se.rolling(window=(mXjitterfilterHW * 2 + 1), center=True).mean()
-    )
+    X = boxcar_filter(X, mXjitterfilterHW)
+    X_se = boxcar_filter(X_se, mXjitterfilterHW)
 
     ##########
     # STEP 2 #
     ##########
 
+    mark("STEP 2")
     # CoreWW=20 and WWrange=0 setting of EOT-Filter is equivalent
     # to single-window (WW20) moving fit
-    _, DX, _, _ = eot_filter(
-        X,
+    X_moments = weighted_window_moments(X)
+
+    _, DX, _, _ = eot_filter_values(
+        X_moments,
         mCoreFW,
         0,
     )
 
+    mark()
+
+    return {
+        "ts_moments": ts_moments,
+        "X": X,
+        "X_se": X_se,
+        "DX_se": DX_se,
+        "X_moments": X_moments,
+        "DX": DX,
+    }
+
+
+def curvature_statistics(DX, params, first_year=None):
+    """Mean curvature of DX over the last core-window years, and the
+    standard deviation of the curvature over the reliable core years,
+    for a DX array beginning in `first_year` (default: first data year
+    within the filter range)."""
+    if first_year is None:
+        first_year = params["nFilterFirstYear"]
+
+    mCoreFW = params["mCoreFW"]
+    nCoreyearsStart = params["nCoreyearsStart"]
+    nCoreyearsEnd = params["nCoreyearsEnd"]
+
+    # curvature
+    CX = np.full_like(DX, np.nan)
+    CX[1:] = DX[1:] - DX[:-1]
+
+    RecentAnnualMeanCX = np.nanmean(
+        CX[
+            year_slice(
+                first_year, nCoreyearsEnd - mCoreFW + 1, nCoreyearsEnd
+            )
+        ],
+        axis=0,
+    )
+
+    nCXstartOK = max((nCoreyearsStart + 1), params["nCXokStart"])
+
+    AvgAnnualCXSDev = np.nanstd(
+        CX[year_slice(first_year, nCXstartOK + 1, nCoreyearsEnd)],
+        axis=0,
+        ddof=1,
+    )
+
+    return RecentAnnualMeanCX, AvgAnnualCXSDev
+
+
+def mw_eot_extension(
+    X, X_se, DX, DX_se, params, first_year=None, curvature=None
+):
+    """Steps 3 to 7 of the MW-EOT algorithm: extrapolation of the trend
+    rate DX and the smoothed series X beyond the core years, and the
+    total uncertainties including the extension uncertainty.
+
+    The input arrays (years x members) begin in `first_year` (default:
+    first data year within the filter range), which may be any year
+    before the last core years.
+    The `curvature` statistics default to those of the given DX and are
+    passed when DX is only a recent part of the record.
+
+    Returns the arrays X, DX, TotalXUnc, TotalDXUnc for the years from
+    `first_year` to nEnd.
+    """
+    if first_year is None:
+        first_year = params["nFilterFirstYear"]
+
+    nEnd = params["nEnd"]
+    nFlattertrendsStart = params["nFlattertrendsStart"]
+    mDXjitterfilterHW = params["mDXjitterfilterHW"]
+    nCoreyearsEnd = params["nCoreyearsEnd"]
+
+    # year offsets
+    iCoreyearsEnd = nCoreyearsEnd - first_year
+    iFlattertrendsStart = nFlattertrendsStart - first_year
+    iEnd = nEnd - first_year
+    n = X.shape[0]
+
+    mark = instr.step_timer("mw_eot_extension")
+
     ##########
     # STEP 3 #
     ##########
 
-    # curvature
-    CX = DX - DX.shift(1)
-
-    RecentAnnualMeanCX = CX.loc[
-        (nCoreyearsEnd - mCoreFW + 1) : nCoreyearsEnd
-    ].mean()
+    mark("STEP 3")
+    if curvature is None:
+        curvature = curvature_statistics(DX, params, first_year)
+    RecentAnnualMeanCX, AvgAnnualCXSDev = curvature
 
     # cumulative addition of mean curvature
-    DX = DX.reindex(
-        np.arange(
-            DX.index[0],
-            nFlattertrendsStart + 1,
-        )
+    DX = resized(DX, iFlattertrendsStart + 1)
+    DX[iCoreyearsEnd + 1 :] = DX[iCoreyearsEnd] + np.multiply.outer(
+        np.arange(1, iFlattertrendsStart - iCoreyearsEnd + 1),
+        RecentAnnualMeanCX,
     )
 
-    DX.loc[nCoreyearsEnd + 1 : nFlattertrendsStart] = DX.loc[
-        nCoreyearsEnd
-    ] + RecentAnnualMeanCX * np.arange(1, nFlattertrendsStart - nCoreyearsEnd + 1)
-    DX_se.loc[nCoreyearsEnd + 1 : nFlattertrendsStart] = DX_se[nCoreyearsEnd]
+    DX_se = DX_se.copy()
+    DX_se[iCoreyearsEnd + 1 : iFlattertrendsStart + 1] = DX_se[iCoreyearsEnd]
 
     ##########
     # STEP 4 #
     ##########
 
+    mark("STEP 4")
+    n_step4 = max(n, iFlattertrendsStart + 1)
+    relative_X_se = resized(
+        np.abs(X_se / X)[: iFlattertrendsStart + 1], n_step4
+    )
+
     DX_se = np.sqrt(
-        DX_se**2
+        resized(DX_se, n_step4) ** 2
         + (
             np.minimum(
-                abs((X_se / X).loc[:nFlattertrendsStart]) * abs(DX),
-                0.25 * abs(DX),
+                relative_X_se * resized(np.abs(DX), n_step4),
+                0.25 * resized(np.abs(DX), n_step4),
             )
             ** 2
         )
     )
 
-    DX.update(
-        DX.rolling(window=(mDXjitterfilterHW * 2 + 1), center=True).mean()
-    )
+    DX = boxcar_filter(DX, mDXjitterfilterHW)
+    DX_se = boxcar_filter(DX_se, mDXjitterfilterHW)
+
+    ##########
+    # STEP 5 #
+    ##########
+
+    mark("STEP 5")
+    # nEnd may precede nFlattertrendsStart; the extension is then cut
+    # to nEnd after this step
+    n_step5 = max(iEnd, iFlattertrendsStart) + 1
+    DX = resized(DX, n_step5)
+    DX_se = resized(DX_se, n_step5)
+
+    # fade out the mean curvature over the mFadeout years (by default
+    # five) after the start of the flatter trends
+    mFadeout = params["mFadeout"]
+    phi = np.arange(1, mFadeout + 1) * (np.pi / (mFadeout + 1))
+    n_flat = n_step5 - iFlattertrendsStart - 1
+    fadeout = np.zeros(n_flat)
+    fadeout[: len(phi)] = (0.5 * (1 + np.cos(phi)))[:n_flat]
+
+    DX[iFlattertrendsStart + 1 :] = DX[
+        iFlattertrendsStart
+    ] + np.multiply.outer(np.cumsum(fadeout), RecentAnnualMeanCX)
+    DX_se[iFlattertrendsStart + 1 :] = DX_se[iFlattertrendsStart]
+
+    DX = DX[: iEnd + 1]
+    DX_se = DX_se[: iEnd + 1]
 
-    DX_se.update(
-        DX_se.rolling(window=(mDXjitterfilterHW * 2 + 1), center=True).mean()
+    ##########
+    # STEP 6 #
+    ##########
+
+    mark("STEP 6")
+    ExtensionDXUnc = np.zeros_like(DX)
+    ExtensionDXUnc[iCoreyearsEnd:] = np.multiply.outer(
+        np.arange(0, iEnd - iCoreyearsEnd + 1), AvgAnnualCXSDev
     )
 
+    TotalDXUnc = np.sqrt(DX_se**2 + ExtensionDXUnc**2)
+
     ##########
-    # STEP 5 #
+    # STEP 7 #
     ##########
 
-    DX = DX.reindex(
-        np.arange(
-            DX.index[0],
-            nEnd + 1,
+    mark("STEP 7")
+    # trapezoidal integration of the extended trend rate
+    X = resized(X, iEnd + 1)
+    X[iCoreyearsEnd + 1 :] = X[iCoreyearsEnd] + np.cumsum(
+        (1 / 2) * (DX[iCoreyearsEnd:-1] + DX[iCoreyearsEnd + 1 :]), axis=0
+    )
+
+    X_se = resized(X_se, iEnd + 1)
+    X_se[iCoreyearsEnd + 1 :] = X_se[iCoreyearsEnd]
+
+    ExtensionXUnc = np.zeros_like(X)
+    ExtensionXUnc[iCoreyearsEnd + 1 :] = np.cumsum(
+        (1 / 2)
+        * (
+            ExtensionDXUnc[iCoreyearsEnd:-1]
+            + ExtensionDXUnc[iCoreyearsEnd + 1 :]
+        ),
+        axis=0,
+    )
+
+    EstimationXUnc = np.nan_to_num(X_se, nan=0.0)
+    TotalXUnc = np.sqrt(ExtensionXUnc**2 + EstimationXUnc**2)
+
+    mark()
+
+    return X, DX, TotalXUnc, TotalDXUnc
+
+
+def mw_eot_smoother_batch(
+    ts,
+    ts_unc,
+    nStart=1960,
+    nEnd=2023,
+    mInnerHW=8,
+    mOuterHW=11,
+    nFlattertrendsStart=2019,
+    nDataEnd=2023,
+    nCXokStart=1971,
+    mFadeout=5,
+    years=None,
+    return_state=False,
+):
+    """MW-EOT smoothing of many series at once.
+
+    `ts` is a DataFrame or 2-D array (years x members); for arrays the
+    corresponding `years` must be given. `ts_unc` is either of the same
+    shape or a single Series/1-D array that applies to all members.
+    Every step of the algorithm is vectorized along the member axis.
+
+    Returns the DataFrames X, DX, TotalXUnc, TotalDXUnc, each of shape
+    (years x members). With `return_state`, the state needed by
+    mw_eot_update to append further years is returned in addition.
+    """
+
+    ts, ts_unc = member_frames(ts, ts_unc, years=years)
+
+    params = mw_eot_parameters(
+        ts.index[0],
+        nStart=nStart,
+        nEnd=nEnd,
+        mInnerHW=mInnerHW,
+        mOuterHW=mOuterHW,
+        nFlattertrendsStart=nFlattertrendsStart,
+        nDataEnd=nDataEnd,
+        nCXokStart=nCXokStart,
+        mFadeout=mFadeout,
+    )
+
+    ts = ts.loc[params["nFilterStart"]:params["nFilterEnd"]]
+    ts_unc = ts_unc.loc[params["nFilterStart"]:params["nFilterEnd"]]
+
+    fits = mw_eot_trendfits(ts.values, ts_unc.values, params)
+
+    results = mw_eot_extension(
+        fits["X"], fits["X_se"], fits["DX"], fits["DX_se"], params
+    )
+
+    frames = result_frames(results, params, ts.columns)
+
+    if return_state:
+        state = dict(
+            fits,
+            params=params,
+            ts=ts.values,
+            ts_unc=ts_unc.values,
+            columns=ts.columns,
+            results=results,
         )
+        return frames + (state,)
+
+    return frames
+
+
+def result_frames(results, params, columns):
+    """DataFrames (years x members) of the smoother's result arrays."""
+    index = pd.Index(
+        np.arange(params["nFilterFirstYear"], params["nEnd"] + 1), dtype=int
+    )
+
+    return tuple(
+        pd.DataFrame(index=index, columns=columns, data=result)
+        for result in results
+    )
+
+
+def mw_eot_update(state, value, value_unc):
+    """Appends the year after the last data year of a previous run to
+    the MW-EOT smoothing, given that run's `state` and the new
+    `value`(s) and `value_unc`(s), one per member.
+
+    Only the trendline fits whose windows reach the new year, and the
+    extension steps 3 to 7, are recomputed; the results are identical
+    to a full rerun with nDataEnd increased by one.
+
+    Returns X, DX, TotalXUnc, TotalDXUnc and the updated state.
+    """
+    old = state["params"]
+    params = mw_eot_parameters(
+        old["first_year"],
+        nStart=old["nStart"],
+        nEnd=old["nEnd"],
+        mInnerHW=old["mInnerHW"],
+        mOuterHW=old["mOuterHW"],
+        nFlattertrendsStart=old["nFlattertrendsStart"],
+        nDataEnd=old["nDataEnd"] + 1,
+        nCXokStart=old["nCXokStart"],
+        mFadeout=old["mFadeout"],
     )
 
-    DX_se = DX_se.reindex(
-        np.arange(
-            DX_se.index[0],
-            nEnd + 1,
+    mCoreFW = params["mCoreFW"]
+    mInnerFW = params["mInnerFW"]
+    mXjitterfilterHW = params["mXjitterfilterHW"]
+    mDXjitterfilterHW = params["mDXjitterfilterHW"]
+    nFilterFirstYear = params["nFilterFirstYear"]
+
+    if nFilterFirstYear + len(state["ts"]) != params["nDataEnd"]:
+        raise IndexError(
+            "mw_eot_update: previous run does not end in "
+            f"{params['nDataEnd'] - 1}."
+        )
+
+    def append_row(values, row):
+        row = np.broadcast_to(
+            np.asarray(row, dtype=float), (1, values.shape[1])
         )
+        return np.concatenate([values, row])
+
+    ts = append_row(state["ts"], value)
+    ts_unc = append_row(state["ts_unc"], value_unc)
+    n = ts.shape[0]
+
+    mark = instr.step_timer("mw_eot_update")
+
+    # STEP 1: only fits whose (index-shifted) windows reach the new year
+    # change; the boxcar filter spreads this by its half-width.
+    first_fit = n - 1 - (mCoreFW + (mCoreFW - mInnerFW)) // 2
+    first_X = first_fit - mXjitterfilterHW
+    context = first_X - mXjitterfilterHW
+
+    mark("STEP 1")
+    ts_moments = update_window_moments(state["ts_moments"], ts, n - 1)
+
+    X_tail, _, X_se_tail, DX_se_tail = eot_filter_values(
+        ts_moments, mCoreFW, (mCoreFW - mInnerFW), start=context
     )
 
-    phi = np.multiply([30, 60, 90, 120, 150], (np.pi / 180))
+    X_se_tail = np.sqrt(X_se_tail**2 + ts_unc[context:] ** 2)
 
-    for i, n in enumerate(DX.loc[nFlattertrendsStart + 1 : nEnd + 1].index):
-        try:
-            DX[n] = DX[n - 1] + RecentAnnualMeanCX * (
-                0.5 * (1 + np.cos(phi[i]))
-            )
-        except IndexError:
-            DX[n] = DX[n - 1]
-        DX_se[n] = DX_se[n - 1]
+    X = np.concatenate(
+        [
+            state["X"][:first_X],
+            boxcar_filter(X_tail, mXjitterfilterHW)[mXjitterfilterHW:],
+        ]
+    )
+    X_se = np.concatenate(
+        [
+            state["X_se"][:first_X],
+            boxcar_filter(X_se_tail, mXjitterfilterHW)[mXjitterfilterHW:],
+        ]
+    )
+    DX_se = np.concatenate([state["DX_se"][:context], DX_se_tail])
 
-    ##########
-    # STEP 6 #
-    ##########
+    # STEP 2: core-window fits that reach the revised part of X
+    mark("STEP 2")
+    X_moments = update_window_moments(state["X_moments"], X, first_X)
+    first_DX = first_X - mCoreFW // 2
 
-    nCXstartOK = max((nCoreyearsStart + 1), 1971)
+    _, DX_tail, _, _ = eot_filter_values(
+        X_moments, mCoreFW, 0, start=first_DX
+    )
+    DX = np.concatenate([state["DX"][:first_DX], DX_tail])
+    mark()
+
+    # STEPS 3-7 on the recent years only, with lead time for the boxcar
+    # filter of step 4; the curvature statistics use the full record
+    last_core = n - 1 - (params["nFilterEnd"] - params["nCoreyearsEnd"])
+    first_ext = min(first_DX, last_core) - mDXjitterfilterHW
+    context = first_ext - mDXjitterfilterHW
+
+    tail = mw_eot_extension(
+        X[context:],
+        X_se[context:],
+        DX[context:],
+        DX_se[context:],
+        params,
+        first_year=nFilterFirstYear + context,
+        curvature=curvature_statistics(DX, params),
+    )
 
-    AvgAnnualCXSDev = CX.loc[(nCXstartOK+1) : (nCoreyearsEnd)].std()
+    results = tuple(
+        np.concatenate([old_result[:first_ext], new[first_ext - context :]])
+        for old_result, new in zip(state["results"], tail)
+    )
+
+    new_state = {
+        "ts_moments": ts_moments,
+        "X": X,
+        "X_se": X_se,
+        "DX_se": DX_se,
+        "X_moments": X_moments,
+        "DX": DX,
+        "params": params,
+        "ts": ts,
+        "ts_unc": ts_unc,
+        "columns": state["columns"],
+        "results": results,
+    }
+
+    return result_frames(results, params, state["columns"]) + (new_state,)
 
-    ExtensionDXUnc = pd.Series(index=DX.index, data=np.zeros(len(DX.index)))
 
-    ExtensionDXUnc.loc[nCoreyearsEnd:nEnd] = (
-        np.arange(0, nEnd - nCoreyearsEnd + 1) * AvgAnnualCXSDev
+def mw_eot_smoother(
+    ts,
+    ts_unc,
+    nStart=1960,
+    nEnd=2023,
+    mInnerHW=8,
+    mOuterHW=11,
+    nFlattertrendsStart=2019,
+    nDataEnd=2023,
+    nCXokStart=1971,
+    mFadeout=5,
+):
+    """MW-EOT smoothing of a single annual series; see
+    mw_eot_smoother_batch for the algorithm."""
+
+    results = mw_eot_smoother_batch(
+        ts.to_frame(),
+        ts_unc,
+        nStart=nStart,
+        nEnd=nEnd,
+        mInnerHW=mInnerHW,
+        mOuterHW=mOuterHW,
+        nFlattertrendsStart=nFlattertrendsStart,
+        nDataEnd=nDataEnd,
+        nCXokStart=nCXokStart,
+        mFadeout=mFadeout,
     )
 
-    TotalDXUnc = np.sqrt(DX_se**2 + ExtensionDXUnc**2)
+    return tuple(r.iloc[:, 0].rename(None) for r in results)
 
-    ##########
-    # STEP 7 #
-    ##########
 
-    X = X.reindex(
-        np.arange(
-            X.index[0],
-            nEnd + 1,
+def mw_eot_smoother_monthly(
+    ts,
+    ts_unc,
+    nStart="1960-01",
+    nEnd="2023-12",
+    mInnerHW=96,
+    mOuterHW=132,
+    nFlattertrendsStart="2019-01",
+    nDataEnd="2023-12",
+    nCXokStart="1971-01",
+    mFadeout=60,
+):
+    """MW-EOT smoothing of monthly series with a datetime index.
+
+    `ts` is a Series or DataFrame (months x members) of monthly values
+    and `ts_unc` their uncertainties, as in mw_eot_smoother_batch. The
+    window half-widths and `mFadeout` are given in months, and the
+    start and end parameters as dates (e.g. "2023-12"). The defaults
+    are the annual ones converted to months.
+
+    Returns X, DX, TotalXUnc, TotalDXUnc indexed by the first day of
+    each month, as Series for Series input and as DataFrames otherwise.
+    DX and its uncertainty are trend rates per month.
+    """
+    months = time_axis.month_numbers(ts.index)
+    if not np.array_equal(np.diff(months), np.ones(len(months) - 1)):
+        raise IndexError(
+            "mw_eot_smoother_monthly: 'ts' must have one value per month."
         )
+
+    results = mw_eot_smoother_batch(
+        as_member_frame(ts.values, years=months),
+        np.asarray(ts_unc, dtype=float),
+        nStart=time_axis.month_number(nStart),
+        nEnd=time_axis.month_number(nEnd),
+        mInnerHW=mInnerHW,
+        mOuterHW=mOuterHW,
+        nFlattertrendsStart=time_axis.month_number(nFlattertrendsStart),
+        nDataEnd=time_axis.month_number(nDataEnd),
+        nCXokStart=time_axis.month_number(nCXokStart),
+        mFadeout=mFadeout,
+        years=months,
     )
 
-    for n in X.loc[nCoreyearsEnd + 1 : nEnd + 1].index:
-        X[n] = X[n - 1] + (1 / 2) * (DX[n - 1] + DX[n])
+    smoothed = []
+    for result in results:
+        result.index = time_axis.month_starts(result.index).rename("time")
+        if ts.ndim == 1:
+            result = result.iloc[:, 0].rename(None)
+        else:
+            result.columns = ts.columns
+        smoothed.append(result)
 
-    X_se = X_se.reindex(
-        np.arange(
-            X.index[0],
-            nEnd + 1,
-        )
+    return tuple(smoothed)
+
+
+@functools.lru_cache(maxsize=64)
+def compile_mw_eot_operator(
+    first_year,
+    last_year,
+    nStart=1960,
+    nEnd=2023,
+    mInnerHW=8,
+    mOuterHW=11,
+    nFlattertrendsStart=2019,
+    nDataEnd=2023,
+    nCXokStart=1971,
+    mFadeout=5,
+):
+    """Linear-operator form of the MW-EOT smoother for annual input
+    series covering `first_year` to `last_year`.
+
+    The EOT fits, jitter filters and extrapolation steps are all linear
+    in the input, so the central estimates X and DX equal weight
+    matrices times the input series. These are computed once by
+    smoothing the unit series of each input year, and cached per
+    parameter set.
+
+    Returns the DataFrames X_operator and DX_operator, indexed by output
+    year (rows) and input year (columns). Each row holds the influence
+    weights of the input years on that output year. DX rows are NaN
+    where the smoother does not provide a trend rate. The operators are
+    cached and shared between callers; copy them before modifying.
+    """
+    nFilterStart = max(nStart - mOuterHW, first_year)
+    nFilterEnd = min(nDataEnd, last_year)
+    years = np.arange(nFilterStart, nFilterEnd + 1)
+
+    X, DX, _, _ = mw_eot_smoother_batch(
+        np.identity(len(years)),
+        np.zeros(len(years)),
+        nStart=nStart,
+        nEnd=nEnd,
+        mInnerHW=mInnerHW,
+        mOuterHW=mOuterHW,
+        nFlattertrendsStart=nFlattertrendsStart,
+        nDataEnd=nDataEnd,
+        nCXokStart=nCXokStart,
+        mFadeout=mFadeout,
+        years=years,
     )
 
-    X_se.loc[nCoreyearsEnd + 1 : nEnd] = X_se[nCoreyearsEnd]
+    operators = []
+    for op in (X, DX):
+        op.columns = pd.Index(years, name="input_year")
+        op.index.name = "year"
+        operators.append(op)
 
-    ExtensionXUnc = pd.Series(index=X.index, data=np.zeros(len(X.index)))
+    return tuple(operators)
 
-    for y in range(nCoreyearsEnd + 1, nEnd + 1):
-        ExtensionXUnc.loc[y] = ExtensionXUnc.loc[y - 1] + (1 / 2) * (ExtensionDXUnc.loc[y - 1] + ExtensionDXUnc.loc[y])
 
-    EstimationXUnc = X_se
-    EstimationXUnc = EstimationXUnc.reindex(ExtensionXUnc.index).fillna(0)
-    TotalXUnc = np.sqrt(ExtensionXUnc**2 + EstimationXUnc**2)
+def apply_mw_eot_operator(operator, ts):
+    """Smooths `ts` (Series or DataFrame of years x members) with an
+    operator from compile_mw_eot_operator, as one matrix product."""
+    data = as_member_frame(ts).loc[operator.columns[0]:operator.columns[-1]]
+    if not data.index.equals(operator.columns):
+        raise IndexError(
+            "apply_mw_eot_operator: input years do not match the operator."
+        )
 
-    return X, DX, TotalXUnc, TotalDXUnc
+    smoothed = pd.DataFrame(
+        index=operator.index,
+        columns=data.columns,
+        data=operator.values @ data.values,
+    )
+
+    if isinstance(ts, pd.Series):
+        return smoothed.iloc[:, 0].rename(None)
+    return smoothed
+
+
+def operator_frequency_response(operator, year):
+    """Gain of the smoother at output `year` as a function of frequency
+    (cycles per year), from the operator row of that year."""
+    weights = operator.loc[year].values
+    gain = np.abs(np.fft.rfft(weights, n=4 * len(weights)))
+
+    return pd.Series(
+        index=pd.Index(
+            np.fft.rfftfreq(4 * len(weights), d=1.0), name="frequency"
+        ),
+        data=gain,
+    )
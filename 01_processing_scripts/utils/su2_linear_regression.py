@@ -1,13 +1,91 @@
 import os
-import math
-import datetime
+import io
+import functools
 import numpy as np
-import statsmodels.api as sm
+from numpy.lib.stride_tricks import sliding_window_view
 import pandas as pd
 from . import su1_mw_eot_algorithm as gdm
+from . import su6_cache as cache
+from . import su7_time_axis as time_axis
+from . import su10_ingestion as ingestion
 
 
-def load_index(name):
+# Regression indices are read from INDEX_START on: the data start in
+# 1850 and the lags and smoothing reach back a few years at most.
+INDEX_START = "1800-01"
+
+
+def read_row_offsets(path):
+    """Byte offsets of the rows of a CSV file with a header line and
+    fractional years in its first column, indexed by month number."""
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    starts = np.flatnonzero(np.frombuffer(raw, dtype=np.uint8) == ord("\n")) + 1
+    starts = starts[starts < len(raw)]
+    years = pd.read_csv(io.BytesIO(raw), usecols=[0]).iloc[:, 0].values
+
+    return pd.Series(
+        index=time_axis.fractional_year_months(years),
+        data=starts,
+        name="offset",
+        )
+
+
+def read_csv_range(path, start=None, end=None):
+    """Rows of a CSV file with fractional years in its first column from
+    month `start` to `end` (anything su7_time_axis.month_number takes;
+    None for open ends). Only the requested rows are parsed, found by
+    the cached row offsets of the file."""
+    offsets = cache.cached(path, read_row_offsets)
+    months = offsets.index.values
+
+    first = 0 if start is None else np.searchsorted(months, time_axis.month_number(start))
+    last = len(months) if end is None else np.searchsorted(months, time_axis.month_number(end), side="right")
+
+    with open(path, "rb") as f:
+        header = f.readline()
+        if first >= last:
+            return pd.read_csv(io.BytesIO(header), index_col=0)
+        f.seek(int(offsets.iloc[first]))
+        size = -1 if last == len(months) else int(offsets.iloc[last] - offsets.iloc[first])
+        rows = f.read(size)
+
+    return pd.read_csv(io.BytesIO(header + rows), index_col=0)
+
+
+def read_volc_index(path, start=None, end=None):
+    """Monthly volcanic stratospheric AOD from its CSV file, optionally
+    restricted to the months `start` to `end`."""
+    if start is None and end is None:
+        return pd.read_csv(path, index_col=0)["stratospheric_AOD"].dropna()
+
+    return read_csv_range(path, start, end)["stratospheric_AOD"].astype(float).dropna()
+
+
+def read_monthly_table_index(path, standardize=False):
+    """Monthly index from a NOAA PSL text table with one row of 12
+    monthly values per year (see su10_ingestion.FORMATS). Time is given
+    as fractional years at mid-month."""
+    raw_data = ingestion.parse_fixed_format(path, "psl_table").set_index("Year")
+
+    first_month = int(raw_data.index[0]) * 12
+    data = pd.Series(
+        index=time_axis.mid_month_years(
+            np.arange(first_month, first_month + raw_data.size)),
+        data=raw_data.values.ravel(),
+        )
+
+    if standardize:
+        data = (data - data.dropna().mean())/data.dropna().std()
+
+    return data.dropna()
+
+
+def load_index(name, start=None, end=None):
+    """Regression index `name` as a monthly float64 series, optionally
+    restricted to the months `start` to `end`, parsed once and then
+    served from the cache (see su6_cache)."""
     idx_dir = os.path.join(
             os.path.dirname(os.path.abspath(__file__)),
             "..",
@@ -18,175 +96,454 @@ def load_index(name):
 
     if name == "volc":
         filename = "volcanic_sAOD_monthly_-50001-202312.csv"
-        data = pd.read_csv(
-            os.path.join(
-                idx_dir,
-                filename,
-                ),
-            index_col=0,
-            )["stratospheric_AOD"]
-
-
-    elif name == "nino34_ERSST" or name == "nino34HadISST" or name == "noaa_nao:":
-        if name == "nino34_ERSST":
-            footer = 3
-        elif name == "nino34_HadISST":
-            footer = 8
-        elif name == "noaa_nao":
-            footer = 0
+        data = cache.cached(
+            os.path.join(idx_dir, filename),
+            read_volc_index,
+            start=start,
+            end=end,
+            )
 
+    elif name == "nino34_ERSST" or name == "nino34_HadISST" or name == "noaa_nao":
         filename = name+".txt"
 
-        raw_data = pd.read_csv(
-            os.path.join(
-                idx_dir,
-                filename,
-                ),
-            sep=r"\s+",
-            skiprows=1,
-            skipfooter=footer,
-            index_col=0,
-            header=None,
-            names=np.arange(1, 13, 1),
-            na_values=-99.99,
-            engine="python",
+        data = cache.cached(
+            os.path.join(idx_dir, filename),
+            read_monthly_table_index,
+            spec=ingestion.FORMATS["psl_table"],
+            standardize=(name == "nino34_ERSST"),
             )
 
-        data = pd.Series(
-            index = np.arange(
-                raw_data.index[0]+ 1/24,
-                raw_data.index[-1] + 1,
-                1/12),
-            data=[raw_data[m].loc[y] for y in raw_data.index for m in raw_data.columns],
-            )
-
-        if name == "nino34_ERSST":
-            data = (data - data.dropna().mean())/data.dropna().std()
+        # the text tables are short, so they are read whole and sliced
+        months = time_axis.fractional_year_months(data.index)
+        keep = np.ones(len(data), dtype=bool)
+        if start is not None:
+            keep &= months >= time_axis.month_number(start)
+        if end is not None:
+            keep &= months <= time_axis.month_number(end)
+        data = data[keep]
 
     else:
         raise KeyError(f"Index name {name} does not correspond to a known index.")
 
-    return data.dropna()
+    return data
 
 
-def regression(data, indices, lags, smoothers, data_smoother=1, sequential=False):
-    if not len(indices) == len(lags):
-        raise IndexError("regression: 'indices' and 'lags' must have same length.")
-    if not len(indices) == len(smoothers):
-        raise IndexError("regression: 'indices' and 'smoothers' must have same length.")
-    idxs = {}
+def hamming_smoother(values, window):
+    """Centered Hamming-weighted moving average along the first axis of
+    a 1-D or 2-D array, as a single matrix product over all windows.
 
-    # smooth regressors and data
-    for name, lag, smooth in zip (indices, lags, smoothers):
-        weights = np.hamming(smooth)
-        idxs[f"{name}_lag{lag}"] = load_index(name).shift(lag).rolling(smooth, center=True).apply(lambda x: np.sum(weights*x)/sum(weights)).bfill().ffill()
-        idxs[f"{name}_lag{lag}"].index = np.round(idxs[f"{name}_lag{lag}"].index, 3) # gets rid of some precision errors in some datasets
-
-        weights = np.hamming(data_smoother)
-        data = data.rolling(data_smoother, center=True).apply(lambda x: np.sum(weights*x)/sum(weights)).bfill().ffill()
-
-    # remove long-term signal
-    ltc, _, _, _ = gdm.mw_eot_smoother(data.groupby(data.index.year).mean().astype(float),
-                                    data.groupby(data.index.year).mean().astype(float)*0, # uncertainty irrelevant here
-                                    nStart=1850,
-                                    nEnd=2024,
+    Windows that reach beyond the data or contain missing values give
+    no average; these are filled with the next, or at the end the last,
+    valid average.
+    """
+    values = np.asarray(values, dtype=float)
+    weights = np.hamming(window)
+    n = values.shape[0]
+
+    smoothed = np.full(values.shape, np.nan)
+    if n >= window:
+        windows = sliding_window_view(values, window, axis=0)
+        smoothed[window // 2 : window // 2 + n - window + 1] = (
+            windows @ weights
+        ) / weights.sum()
+
+    filled = pd.DataFrame(smoothed.reshape(n, -1)).bfill().ffill()
+
+    return filled.values.reshape(values.shape)
+
+
+def least_squares_fit(X, Y):
+    """Least-squares coefficients, fitted values and residuals of all
+    columns of `Y` against the design matrix `X`, in one solve."""
+    coefficients = np.linalg.lstsq(X, Y, rcond=None)[0]
+    fitted = X @ coefficients
+
+    return coefficients, fitted, Y - fitted
+
+
+def fit_regressors(x, Y, sequential=False):
+    """Fits the regressors `x` (months x regressors) plus a constant to
+    all targets `Y` (months x targets) at once; in sequential mode one
+    regressor after another to the residuals of the previous ones.
+
+    Returns the coefficients (constant and regressors x targets; in
+    sequential mode the sum of the constants of all steps), the fitted
+    values and the residuals.
+    """
+    ones = np.ones((len(x), 1))
+
+    if not sequential:
+        return least_squares_fit(np.hstack([ones, x]), Y)
+
+    residuals = Y
+    coefficients = np.zeros((x.shape[1] + 1, Y.shape[1]))
+    for i in range(x.shape[1]):
+        step_coefficients, _, residuals = least_squares_fit(
+            np.hstack([ones, x[:, i : i + 1]]), residuals
+        )
+        coefficients[0] += step_coefficients[0]
+        coefficients[i + 1] = step_coefficients[1]
+
+    return coefficients, Y - residuals, residuals
+
+
+def rolling_least_squares(X, y, window):
+    """Least-squares coefficients (positions x terms) of `y` on the
+    design matrix `X` (months x terms) in every window of `window`
+    consecutive months. The normal equations of all windows are the
+    differences of cumulative sums of the cross products, so every
+    month enters them once, and all windows are solved at once.
+
+    Windows in which the terms are (nearly) collinear, e.g. a regressor
+    that is zero or constant throughout, get the minimum-norm solution
+    of np.linalg.lstsq on their months instead."""
+    XX = np.cumsum(X[:, :, np.newaxis] * X[:, np.newaxis, :], axis=0)
+    Xy = np.cumsum(X * y[:, np.newaxis], axis=0)
+    XX = np.concatenate([np.zeros((1,) + XX.shape[1:]), XX])
+    Xy = np.concatenate([np.zeros((1,) + Xy.shape[1:]), Xy])
+
+    XX = XX[window:] - XX[:-window]
+    Xy = Xy[window:] - Xy[:-window]
+
+    # the normal equations square the condition number of the window
+    with np.errstate(divide="ignore", invalid="ignore"):
+        singular = ~(
+            np.linalg.cond(XX) < 1 / (np.finfo(float).eps * window)
+        )
+
+    coefficients = np.empty(Xy.shape)
+    coefficients[~singular] = np.linalg.solve(
+        XX[~singular], Xy[~singular][:, :, np.newaxis]
+    )[:, :, 0]
+    for i in np.flatnonzero(singular):
+        coefficients[i] = np.linalg.lstsq(
+            X[i : i + window], y[i : i + window], rcond=None
+        )[0]
+
+    return coefficients
+
+
+def lagged_copies(values, min_lag, max_lag):
+    """Copies of `values` lagged by `min_lag` to `max_lag` months
+    (months x lags), as a strided view without copying; row i belongs
+    to month i + max_lag of `values`."""
+    return sliding_window_view(values, max_lag - min_lag + 1)[:, ::-1]
+
+
+def smoothness_penalty(n_regressors, n_lags):
+    """Second differences of the lag coefficients of each regressor
+    (rows x constant and regressors' lags), unpenalized constant."""
+    differences = np.diff(np.eye(n_lags), n=min(2, n_lags - 1), axis=0)
+    blocks = np.kron(np.eye(n_regressors), differences)
+
+    return np.hstack([np.zeros((len(blocks), 1)), blocks])
+
+
+@functools.lru_cache(maxsize=256)
+def regressor(name, lag, smooth):
+    """Index `name` lagged by `lag` months and smoothed with a Hamming
+    window of `smooth` months, indexed by month number (see
+    su7_time_axis). Each column is computed once per process and shared
+    between callers; copy it before modifying."""
+    idx = load_index(name, start=INDEX_START).shift(lag)
+
+    return pd.Series(
+        index=time_axis.fractional_year_months(idx.index),
+        data=hamming_smoother(idx.values, smooth),
+        )
+
+
+def long_term_signal(data, data_smoother=1, nStart=1850, nEnd=2024):
+    """Smooths the monthly DataFrame `data` with a Hamming window of
+    `data_smoother` months and subtracts its long-term signal, the
+    MW-EOT smoothed annual means (of years `nStart` to `nEnd`)
+    interpolated to months, from all columns at once.
+
+    Returns the anomalies, indexed by month number, and the long-term
+    signal on the original time axis.
+    """
+    data = pd.DataFrame(
+        index=data.index,
+        columns=data.columns,
+        data=hamming_smoother(data.values, data_smoother),
+        )
+
+    annual_data = time_axis.annual_means(data).astype(float)
+    ltc, _, _, _ = gdm.mw_eot_smoother_batch(annual_data,
+                                    np.zeros(len(annual_data)), # uncertainty irrelevant here
+                                    nStart=nStart,
+                                    nEnd=nEnd,
                                     )
 
     ltc.index = pd.date_range(f"{ltc.index[0]}-06-15", f"{ltc.index[-1]+1}-06-15", freq="YS-JUN")
     ltc = ltc.reindex(data.index).interpolate(method="linear").bfill()
     data = data - ltc
 
-    # reindex to match load_index conventions
-    time_start = data.index.year[0] - (1/24) + data.index.month[0] * (1/12)
-    time_end = data.index.year[-1] - (1/24) + data.index.month[-1] * (1/12)
+    # reindex to month numbers, as the indices
+    data.index = time_axis.month_numbers(data.index)
 
-    data_time = np.linspace(
-            time_start,
-            time_end,
-            round((time_end-time_start) * 12) + 1
-        )
+    return data, ltc
 
-    data.index = np.round(data_time, 3)
 
-    # shorten to longest common period
-    alldata = [idx for idx in idxs.values()]
-    alldata.append(data)
+def remove_long_term_signal(data, data_smoother=1, nStart=1850, nEnd=2024):
+    """Anomalies and long-term signal of the monthly DataFrame `data`
+    (see long_term_signal), computed once per process for equal data and
+    parameters, so regressions with different regressors on the same
+    datasets share them."""
+    return cache.memoized(
+        long_term_signal,
+        data,
+        data_smoother=data_smoother,
+        nStart=nStart,
+        nEnd=nEnd,
+        )
+
 
-    first_months = [d.dropna().index[0] for d in alldata]
-    time_start = np.max(first_months)
+def regression_batch(data, indices, lags, smoothers, data_smoother=1, sequential=False):
+    """Regresses the lagged, smoothed indices out of every column of the
+    monthly DataFrame `data` (e.g. several datasets or ensemble members).
 
-    last_months = [d.dropna().index[-1] for d in alldata]
-    time_end = np.min(last_months)
+    The regressor matrix is built once and all targets that share the
+    same common period with the indices are solved in one least-squares
+    fit with many right-hand sides. In sequential mode, the regressors
+    are fitted one after another to the residuals of the previous ones.
 
-    data = data.loc[time_start:time_end]
-    for name in idxs.keys():
-        idxs[name] = idxs[name].loc[time_start:time_end]
+    Returns a dict with the DataFrames "residual" (including the
+    long-term signal) and "model", the "coefficients" (terms x targets;
+    in sequential mode the sum of the constants of all steps) and the
+    Series "r2".
+    """
+    if not len(indices) == len(lags):
+        raise IndexError("regression: 'indices' and 'lags' must have same length.")
+    if not len(indices) == len(smoothers):
+        raise IndexError("regression: 'indices' and 'smoothers' must have same length.")
 
-    # check if all timelines are identical now
-    for idx in idxs.values():
-        if not idx.index.equals(data.index):
+    # smooth regressors and data
+    idxs = {
+        f"{name}_lag{lag}": regressor(name, lag, smooth)
+        for name, lag, smooth in zip (indices, lags, smoothers)
+    }
+
+    data, ltc = remove_long_term_signal(data, data_smoother)
+
+    # longest common period of the indices
+    time_start = np.max([idx.dropna().index[0] for idx in idxs.values()])
+    time_end = np.min([idx.dropna().index[-1] for idx in idxs.values()])
+
+    # group targets by their common period with the indices
+    periods = {}
+    for c in data.columns:
+        valid = data[c].dropna().index
+        period = (max(time_start, valid[0]), min(time_end, valid[-1]))
+        periods.setdefault(period, []).append(c)
+
+    names = list(idxs.keys())
+    resid = pd.DataFrame(index=data.index, columns=data.columns, dtype=float)
+    model = pd.DataFrame(index=data.index, columns=data.columns, dtype=float)
+    coefficients = pd.DataFrame(index=["const"] + names, columns=data.columns, dtype=float)
+    r2 = pd.Series(index=data.columns, dtype=float)
+
+    for (start, end), targets in periods.items():
+        Y = data[targets].loc[start:end]
+        x = pd.DataFrame({name: idxs[name].loc[start:end] for name in names})
+
+        # check if all timelines are identical now
+        if not x.index.equals(Y.index):
             raise IndexError("regression: timelines of data and indices do not align")
 
-    # regression
+        Y = Y.values.astype(float)
+        x = x.values.astype(float)
 
-    if sequential:
-        resid = data.copy()
-        for idx in idxs.items():
-            x = pd.DataFrame(
-                index=idx[1].index,
-                data=idx[1].values,
-                columns=[idx[0]],
-                dtype=float,
-                )
-            X = sm.add_constant(x)
-            ols = sm.OLS(resid.astype(float), X)
-            res = ols.fit()
+        # regression
 
-            resid = res.resid
-            resvar = resid.std()**2
+        coefs, fitted, residuals = fit_regressors(x, Y, sequential)
 
-        r2 = (data.std()**2 - resvar)/data.std()**2
+        if sequential:
+            r2_values = 1 - residuals.var(axis=0, ddof=1) / Y.var(axis=0, ddof=1)
+        else:
+            r2_values = 1 - (residuals**2).sum(axis=0) / (
+                (Y - Y.mean(axis=0))**2
+            ).sum(axis=0)
 
-        model = data - resid
+        resid.loc[start:end, targets] = residuals
+        model.loc[start:end, targets] = fitted
+        coefficients[targets] = coefs
+        r2[targets] = r2_values
 
-    else:
-        x = pd.DataFrame(
-            index=data.index,
-            data=np.array([idx.values for idx in idxs.values()]).T,
-            columns=idxs.keys(),
-            dtype=float,
-            )
-        X = sm.add_constant(x)
-        ols = sm.OLD(data.astype(float), X)
-        res = ols.fit()
+    resid = resid.dropna(how="all")
+    model = model.loc[resid.index]
 
-        resid = res.resid
-        r2 = res.rsquared
+    # convert back to datetime
+    resid.index = time_axis.month_starts(resid.index)
+    model.index = resid.index
 
-        model = (res.params*X).sum(axis=1)
+    # add long-term signal
+    resid = (resid + ltc.loc[resid.index[0]:resid.index[-1]]).dropna(how="all")
 
-    # convert back to datetime
-    datetime_timeline = []
-    for d in resid.index:
-        year=int(math.floor(d))
-        year_fraction = d - year
+    return {
+        "residual": resid,
+        "model": model,
+        "coefficients": coefficients,
+        "r2": r2,
+    }
 
-        if (year % 4 == 0 and year % 100 != 0) or (year % 400 == 0):
-            days_in_year = 366
-        else:
-            days_in_year = 365
 
-        day_of_year = int(round(year_fraction*days_in_year))
-        month = (day_of_year - 1) // 30 + 1
-        if month > 12:
-            month = 12
+def regression(data, indices, lags, smoothers, data_smoother=1, sequential=False):
+    """Regression of a single monthly series; see regression_batch.
+    Returns the residual (including the long-term signal) and the
+    model."""
+    results = regression_batch(
+        data.to_frame(),
+        indices,
+        lags,
+        smoothers,
+        data_smoother=data_smoother,
+        sequential=sequential,
+        )
+
+    return (
+        results["residual"].iloc[:, 0].dropna(),
+        results["model"].iloc[:, 0].rename(data.name),
+        )
+
+
+def rolling_regression(data, indices, lags, smoothers, window_years=30, data_smoother=1):
+    """Regression of the lagged, smoothed indices out of the monthly
+    Series `data` with time-varying coefficients, fitted simultaneously
+    in moving windows of `window_years` years.
+
+    The coefficients of each window are assigned to its central month;
+    each month is regressed with the coefficients of the window centred
+    on it, and the months of the first and last half window with those
+    of the first and last window.
+
+    Returns a dict with the DataFrame "coefficients" (months x terms)
+    and the Series "residual" (including the long-term signal) and
+    "model".
+    """
+    if not len(indices) == len(lags):
+        raise IndexError("regression: 'indices' and 'lags' must have same length.")
+    if not len(indices) == len(smoothers):
+        raise IndexError("regression: 'indices' and 'smoothers' must have same length.")
+
+    idxs = {
+        f"{name}_lag{lag}": regressor(name, lag, smooth)
+        for name, lag, smooth in zip (indices, lags, smoothers)
+    }
+
+    anomalies, ltc = remove_long_term_signal(data.to_frame(), data_smoother)
+    anomalies = anomalies.iloc[:, 0]
+
+    # longest common period of the indices and the data
+    alldata = list(idxs.values()) + [anomalies]
+    time_start = np.max([d.dropna().index[0] for d in alldata])
+    time_end = np.min([d.dropna().index[-1] for d in alldata])
+
+    y = anomalies.loc[time_start:time_end].values.astype(float)
+    X = np.column_stack(
+        [np.ones(len(y))]
+        + [idx.loc[time_start:time_end].values for idx in idxs.values()]
+    ).astype(float)
+
+    window = window_years * 12
+    if window > len(y):
+        raise ValueError(
+            f"regression: window of {window_years} years exceeds the common period."
+        )
+
+    # coefficients at the window centres, held constant towards the ends
+    coefs = rolling_least_squares(X, y, window)
+    centres = np.arange(len(coefs)) + window // 2
+    local = coefs[np.clip(np.arange(len(y)) - window // 2, 0, len(coefs) - 1)]
 
-        datetime_timeline.append(datetime.datetime(year, month, 1))
+    fitted = (X * local).sum(axis=1)
+    months = anomalies.loc[time_start:time_end].index
+    dates = time_axis.month_starts(months)
 
-    resid.index = datetime_timeline
-    model.index = datetime_timeline
+    coefficients = pd.DataFrame(
+        index=dates,
+        columns=["const"] + list(idxs.keys()),
+        dtype=float,
+    )
+    coefficients.iloc[centres] = coefs
 
     # add long-term signal
-    resid = (resid + ltc.loc[resid.index[0]:resid.index[-1]]).dropna()
+    resid = y - fitted + ltc.iloc[:, 0].loc[dates].values
+
+    return {
+        "coefficients": coefficients,
+        "residual": pd.Series(index=dates, data=resid, name=data.name),
+        "model": pd.Series(index=dates, data=fitted, name=data.name),
+    }
+
+
+def distributed_lag_regression(data, indices, smoothers, min_lag=0, max_lag=24, penalty=0.0, data_smoother=1):
+    """Regression of the monthly Series `data` on the copies of each of
+    the smoothed `indices` lagged by `min_lag` to `max_lag` months, all
+    fitted jointly, which spreads their impacts over a range of lags.
 
-    return resid, model
+    A positive `penalty` weights the squared second differences of the
+    lag coefficients of each index (ridge regularization), favouring
+    smooth lag responses. The penalized problem is solved in one
+    least-squares call on the design matrix augmented by the penalty.
+
+    Returns a dict with the DataFrame "coefficients" (lags x indices),
+    the float "const" and the Series "residual" (including the long-term
+    signal) and "model".
+    """
+    if not len(indices) == len(smoothers):
+        raise IndexError("regression: 'indices' and 'smoothers' must have same length.")
+    if not 0 <= min_lag <= max_lag:
+        raise ValueError("regression: lags must satisfy 0 <= min_lag <= max_lag.")
+
+    anomalies, ltc = remove_long_term_signal(data.to_frame(), data_smoother)
+    anomalies = anomalies.iloc[:, 0].dropna()
+
+    # lagged copies of the indices, indexed by month number
+    copies = {}
+    for name, smooth in zip(indices, smoothers):
+        idx = regressor(name, 0, smooth).dropna()
+        lagged = lagged_copies(idx.values, min_lag, max_lag)
+        copies[name] = (idx.index[0] + max_lag + np.arange(len(lagged)), lagged)
+
+    # longest common period of the lagged indices and the data
+    time_start = max([months[0] for months, _ in copies.values()] + [anomalies.index[0]])
+    time_end = min([months[-1] for months, _ in copies.values()] + [anomalies.index[-1]])
+
+    y = anomalies.loc[time_start:time_end].values.astype(float)
+    X = np.column_stack(
+        [np.ones(len(y))]
+        + [lagged[time_start - months[0] : time_end - months[0] + 1] for months, lagged in copies.values()]
+    )
+
+    if len(y) != time_end - time_start + 1:
+        raise IndexError("regression: timelines of data and indices do not align")
+
+    # regression, penalized by appending the weighted penalty rows
+    n_lags = max_lag - min_lag + 1
+    if penalty > 0 and n_lags > 1:
+        D = np.sqrt(penalty) * smoothness_penalty(len(indices), n_lags)
+        coefs = np.linalg.lstsq(
+            np.vstack([X, D]),
+            np.concatenate([y, np.zeros(len(D))]),
+            rcond=None,
+        )[0]
+    else:
+        coefs = np.linalg.lstsq(X, y, rcond=None)[0]
+
+    fitted = X @ coefs
+    dates = time_axis.month_starts(anomalies.loc[time_start:time_end].index)
+
+    # add long-term signal
+    resid = y - fitted + ltc.iloc[:, 0].loc[dates].values
+
+    return {
+        "coefficients": pd.DataFrame(
+            index=pd.RangeIndex(min_lag, max_lag + 1, name="lag"),
+            columns=list(indices),
+            data=coefs[1:].reshape(len(indices), n_lags).T,
+            ),
+        "const": coefs[0],
+        "residual": pd.Series(index=dates, data=resid, name=data.name),
+        "model": pd.Series(index=dates, data=fitted, name=data.name),
+    }
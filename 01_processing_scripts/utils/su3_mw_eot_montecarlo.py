@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+from . import su1_mw_eot_algorithm as gdm
+from . import su12_parallel as parallel
+
+
+def correlated_noise(rng, n_years, n_draws, correlation=0.0):
+    """Standard-normal noise of shape (n_years x n_draws) with the given
+    inter-year correlation.
+
+    `correlation` is either the lag-1 correlation of an AR(1) process,
+    i.e. a correlation of correlation**|i-j| between years i and j, or
+    a full (n_years x n_years) correlation matrix.
+    """
+    z = rng.standard_normal((n_years, n_draws))
+
+    if np.ndim(correlation) == 2:
+        return np.linalg.cholesky(correlation) @ z
+
+    noise = np.empty_like(z)
+    noise[0] = z[0]
+    innovation = np.sqrt(1 - correlation**2)
+    for i in range(1, n_years):
+        noise[i] = correlation * noise[i - 1] + innovation * z[i]
+
+    return noise
+
+
+def smooth_perturbed_draws(
+    values, sigma, years, n_draws, correlation, smoother_params, seed
+):
+    """Draws `n_draws` perturbed realizations of an annual series and
+    returns their smoothed X and DX (output years x draws).
+
+    The smoothing uses the linear-operator form of the MW-EOT smoother,
+    which gives the same X and DX as running every draw through it.
+    """
+    X_operator, DX_operator = gdm.compile_mw_eot_operator(
+        int(years[0]), int(years[-1]), **smoother_params
+    )
+    rows = np.searchsorted(years, X_operator.columns.values)
+
+    rng = np.random.default_rng(seed)
+    draws = values[rows, np.newaxis] + sigma[
+        rows, np.newaxis
+    ] * correlated_noise(rng, len(years), n_draws, correlation)[rows]
+
+    return X_operator.values @ draws, DX_operator.values @ draws
+
+
+def mw_eot_monte_carlo(
+    ts,
+    ts_unc,
+    n_draws=10000,
+    correlation=0.0,
+    quantiles=(0.05, 0.17, 0.5, 0.83, 0.95),
+    seed=0,
+    n_workers=None,
+    chunk_size=2500,
+    **smoother_params,
+):
+    """Monte Carlo propagation of the input uncertainty through the
+    MW-EOT smoother.
+
+    Draws `n_draws` Gaussian realizations of the annual series `ts`
+    with standard uncertainties `ts_unc` and the given inter-year
+    `correlation` (see correlated_noise), smooths them with the
+    parameters in `smoother_params` and returns the empirical
+    `quantiles` of X and DX per year as two DataFrames (years x
+    quantiles).
+
+    The draws are split into chunks of `chunk_size` that run on a
+    process pool of `n_workers` (default: all cores; 1 runs in this
+    process), each with its own random stream spawned from `seed` (see
+    su12_parallel.run_chunks).
+    """
+    values = ts.values.astype(float)
+    sigma = ts_unc.reindex(ts.index).values.astype(float)
+    years = ts.index.values
+
+    tasks = [
+        (values, sigma, years, n, correlation, smoother_params)
+        for n in parallel.chunk_sizes(n_draws, chunk_size)
+    ]
+    smoothed = parallel.run_chunks(
+        smooth_perturbed_draws, tasks, n_workers, seed
+    )
+
+    X_draws = np.concatenate([s[0] for s in smoothed], axis=1)
+    DX_draws = np.concatenate([s[1] for s in smoothed], axis=1)
+
+    X_operator, _ = gdm.compile_mw_eot_operator(
+        int(years[0]), int(years[-1]), **smoother_params
+    )
+
+    def quantile_frame(draws):
+        return pd.DataFrame(
+            index=X_operator.index,
+            columns=pd.Index(quantiles, name="quantile"),
+            data=np.quantile(draws, quantiles, axis=1).T,
+        )
+
+    return quantile_frame(X_draws), quantile_frame(DX_draws)
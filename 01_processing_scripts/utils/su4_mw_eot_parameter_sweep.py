@@ -0,0 +1,234 @@
+import os
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+import xarray as xr
+from . import su1_mw_eot_algorithm as gdm
+from . import su12_parallel as parallel
+
+
+OUTPUT_VARIABLES = ["X", "DX", "X_1sigma", "DX_1sigma"]
+
+
+def smooth_parameter_group(
+    ts, ts_unc, mInnerHW, mOuterHW, extension_settings, nStart, nDataEnd
+):
+    """Smooths `ts` for one pair of window half-widths and all given
+    (nFlattertrendsStart, nEnd) settings.
+
+    These settings only enter steps 3 to 7, so the trendline fits of
+    steps 1 and 2 (and their window sums) are computed once and shared.
+    Settings that begin the flatter trends, or end, before the last core
+    year are skipped, as the extension starts from the last core year.
+
+    Returns the first year of the results and a dict of the result
+    arrays per setting.
+    """
+    params = gdm.mw_eot_parameters(
+        ts.index[0],
+        nStart=nStart,
+        mInnerHW=mInnerHW,
+        mOuterHW=mOuterHW,
+        nDataEnd=nDataEnd,
+    )
+
+    fits = gdm.mw_eot_trendfits(
+        ts.loc[params["nFilterStart"]:params["nFilterEnd"]].values,
+        ts_unc.loc[params["nFilterStart"]:params["nFilterEnd"]].values,
+        params,
+    )
+    curvature = gdm.curvature_statistics(fits["DX"], params)
+
+    results = {}
+    for nFlattertrendsStart, nEnd in extension_settings:
+        if min(nFlattertrendsStart, nEnd) < params["nCoreyearsEnd"]:
+            continue
+        results[(nFlattertrendsStart, nEnd)] = gdm.mw_eot_extension(
+            fits["X"],
+            fits["X_se"],
+            fits["DX"],
+            fits["DX_se"],
+            dict(params, nFlattertrendsStart=nFlattertrendsStart, nEnd=nEnd),
+            curvature=curvature,
+        )
+
+    return params["nFilterFirstYear"], results
+
+
+def sweep_mw_eot_parameters(
+    ts,
+    ts_unc,
+    mInnerHW=(8,),
+    mOuterHW=(11,),
+    nFlattertrendsStart=(2019,),
+    nEnd=(2040,),
+    nStart=1850,
+    nDataEnd=2023,
+    n_workers=None,
+):
+    """Evaluates the MW-EOT smoother on the full grid of the given
+    parameter values, for one or more input series.
+
+    `ts` and `ts_unc` are Series or DataFrames (years x members). The
+    grid is split into groups of equal window half-widths, and the
+    (nFlattertrendsStart, nEnd) settings of each group into as many
+    parts as needed to occupy a process pool of `n_workers` (default:
+    all cores). Combinations the smoother does not support (e.g.
+    mOuterHW < mInnerHW, or flatter trends or nEnd before the last core
+    year) are left empty.
+
+    Returns an xarray Dataset with the variables X, DX, X_1sigma and
+    DX_1sigma on the dimensions (mInnerHW, mOuterHW,
+    nFlattertrendsStart, nEnd, member, year).
+    """
+    ts, ts_unc = gdm.member_frames(ts, ts_unc)
+
+    grid = {
+        "mInnerHW": list(mInnerHW),
+        "mOuterHW": list(mOuterHW),
+        "nFlattertrendsStart": list(nFlattertrendsStart),
+        "nEnd": list(nEnd),
+    }
+    groups = [
+        (inner, outer)
+        for inner, outer in itertools.product(
+            grid["mInnerHW"], grid["mOuterHW"]
+        )
+        if outer >= inner
+    ]
+    extension_settings = list(
+        itertools.product(grid["nFlattertrendsStart"], grid["nEnd"])
+    )
+
+    n_workers = parallel.worker_count(n_workers)
+
+    # split the extension settings if there are fewer groups than workers
+    n_parts = min(len(extension_settings), -(-n_workers // len(groups)))
+    tasks = [
+        (
+            ts,
+            ts_unc,
+            inner,
+            outer,
+            extension_settings[i::n_parts],
+            nStart,
+            nDataEnd,
+        )
+        for inner, outer in groups
+        for i in range(n_parts)
+    ]
+
+    results = parallel.run_chunks(smooth_parameter_group, tasks, n_workers)
+
+    years = np.arange(
+        min(ts.index[0], nStart - max(grid["mOuterHW"])),
+        max(grid["nEnd"]) + 1,
+    )
+    shape = [len(v) for v in grid.values()] + [len(ts.columns), len(years)]
+    cube = {var: np.full(shape, np.nan) for var in OUTPUT_VARIABLES}
+
+    for task, (first_year, group_results) in zip(tasks, results):
+        i = grid["mInnerHW"].index(task[2])
+        j = grid["mOuterHW"].index(task[3])
+        for (flat, end), outputs in group_results.items():
+            k = grid["nFlattertrendsStart"].index(flat)
+            l = grid["nEnd"].index(end)
+            for var, output in zip(OUTPUT_VARIABLES, outputs):
+                rows = np.searchsorted(years, first_year) + np.arange(
+                    output.shape[0]
+                )
+                cube[var][i, j, k, l][:, rows] = output.T
+
+    dims = list(grid.keys()) + ["member", "year"]
+    coords = dict(grid, member=[str(c) for c in ts.columns], year=years)
+
+    return xr.Dataset(
+        {var: (dims, values) for var, values in cube.items()},
+        coords=coords,
+        attrs={"nStart": nStart, "nDataEnd": nDataEnd},
+    )
+
+
+# argparse for the command-line interface
+def parse_sweep_args():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Sweep MW-EOT smoother parameters over annual ClimTrace data."
+        ),
+    )
+
+    parser.add_argument(
+        "--var",
+        choices=["GMST", "GSAT"],
+        nargs="+",
+        default=["GMST", "GSAT"],
+        help="ClimTrace variables to smooth (one member each).",
+    )
+    parser.add_argument("--inner", type=int, nargs="+", default=[8])
+    parser.add_argument("--outer", type=int, nargs="+", default=[11])
+    parser.add_argument("--flat", type=int, nargs="+", default=[2019])
+    parser.add_argument("--end", type=int, nargs="+", default=[2040])
+    parser.add_argument("--start", type=int, default=1850)
+    parser.add_argument("--data-end", type=int, default=2023)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: all cores).",
+    )
+    parser.add_argument(
+        "--output",
+        default="mw_eot_parameter_sweep.nc",
+        help="Output netCDF filename (written to 02_output_data).",
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_sweep_args()
+
+    data_dir = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "..",
+        "..",
+        "02_output_data",
+    )
+
+    annual_data = {
+        var: pd.read_csv(
+            os.path.join(
+                data_dir,
+                f"{var.lower()}_annual_climtrace_1850-2024.csv",
+            ),
+            index_col=0,
+        )
+        for var in args.var
+    }
+
+    sweep = sweep_mw_eot_parameters(
+        pd.concat(
+            [annual_data[v][f"ClimTrace_{v}"] for v in args.var],
+            axis=1,
+            keys=args.var,
+        ),
+        pd.concat(
+            [annual_data[v][f"ClimTrace_{v}_1sigma"] for v in args.var],
+            axis=1,
+            keys=args.var,
+        ),
+        mInnerHW=args.inner,
+        mOuterHW=args.outer,
+        nFlattertrendsStart=args.flat,
+        nEnd=args.end,
+        nStart=args.start,
+        nDataEnd=args.data_end,
+        n_workers=args.workers,
+    )
+
+    sweep.to_netcdf(os.path.join(data_dir, args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import contextlib
+import tracemalloc
+import pandas as pd
+
+
+# Instrumentation is off unless enabled with the `instrumented` context
+# manager, or for a whole run by setting CLIMTRACE_INSTRUMENT to the path
+# of a JSON-lines file the records are appended to.
+ENV_VARIABLE = "CLIMTRACE_INSTRUMENT"
+
+STATE = {
+    "enabled": False,
+    "records": [],
+    "path": None,
+    "stage": None,
+    "n_fits": 0,
+}
+
+
+def skip_step(step=None):
+    """Stand-in for a step timer while instrumentation is off."""
+
+
+def step_timer(function):
+    """Returns a step timer for one call of `function`: calling it with
+    a step name ends the current step, if any, and begins the next one;
+    calling it without ends the last step. Each ended step emits a record
+    of its wall time, regression fits and allocated bytes.
+
+    When instrumentation is off, a no-op is returned.
+    """
+    if not STATE["enabled"]:
+        return skip_step
+
+    current = {"step": None}
+
+    def mark(step=None):
+        if current["step"] is not None:
+            wall_time = time.perf_counter() - current["start"]
+            allocated = None
+            if tracemalloc.is_tracing():
+                allocated = (
+                    tracemalloc.get_traced_memory()[1] - current["memory"]
+                )
+            emit(
+                {
+                    "stage": STATE["stage"],
+                    "function": function,
+                    "step": current["step"],
+                    "wall_time": wall_time,
+                    "n_fits": STATE["n_fits"],
+                    "bytes_allocated": allocated,
+                }
+            )
+
+        current["step"] = step
+        if step is None:
+            return
+
+        STATE["n_fits"] = 0
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            current["memory"] = tracemalloc.get_traced_memory()[0]
+        current["start"] = time.perf_counter()
+
+    return mark
+
+
+def count_fits(n):
+    """Adds `n` regression fits to the current step."""
+    if STATE["enabled"]:
+        STATE["n_fits"] += n
+
+
+def emit(record):
+    STATE["records"].append(record)
+    if STATE["path"] is not None:
+        with open(STATE["path"], "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+@contextlib.contextmanager
+def instrumented(path=None, stage=None, trace_memory=True):
+    """Enables instrumentation within the context and yields the list
+    the step records are collected in. With `path`, the records are
+    appended to that JSON-lines file as well; `stage` labels them.
+
+    Memory tracing (tracemalloc) slows down the instrumented code
+    considerably and can be switched off with `trace_memory`.
+    """
+    previous = dict(STATE)
+    STATE.update(
+        enabled=True,
+        records=[],
+        path=path if path is not None else previous["path"],
+        stage=stage if stage is not None else previous["stage"],
+    )
+
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+
+    try:
+        yield STATE["records"]
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+        records = STATE["records"]
+        STATE.update(previous)
+        if previous["enabled"]:
+            STATE["records"].extend(records)
+
+
+def read_records(path):
+    """DataFrame of the records in a JSON-lines file."""
+    with open(path) as f:
+        return pd.DataFrame([json.loads(line) for line in f if line.strip()])
+
+
+def aggregate_records(records):
+    """Totals of wall time and regression fits, the number of calls and
+    the largest allocation per stage, function and step."""
+    if not isinstance(records, pd.DataFrame):
+        records = pd.DataFrame(records)
+
+    return (
+        records.fillna({"stage": ""})
+        .groupby(["stage", "function", "step"], sort=False)
+        .agg(
+            calls=("wall_time", "size"),
+            wall_time=("wall_time", "sum"),
+            n_fits=("n_fits", "sum"),
+            max_bytes_allocated=("bytes_allocated", "max"),
+        )
+    )
+
+
+if os.environ.get(ENV_VARIABLE):
+    STATE.update(enabled=True, path=os.environ[ENV_VARIABLE])
+    tracemalloc.start()
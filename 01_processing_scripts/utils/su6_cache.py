@@ -0,0 +1,187 @@
+import os
+import json
+import collections
+import threading
+import hashlib
+import numpy as np
+import pandas as pd
+
+
+# Parsed input files are kept in memory for the running process and as
+# binary .npz files in CACHE_DIR (override with CLIMTRACE_CACHE_DIR).
+# Entries are keyed on the file path, its modification time and size,
+# the loader options and format spec, and CACHE_VERSION, so edited input
+# files, changed formats and parsers are parsed again.
+# Results computed from data in memory (see memoized) are keyed on a
+# hash of the data and kept in memory only. The memory cache keeps the
+# MEMORY_CACHE_SIZE most recently used entries.
+CACHE_DIR = os.environ.get(
+    "CLIMTRACE_CACHE_DIR",
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)),
+        "..",
+        "..",
+        ".cache",
+    ),
+)
+
+# Increase when a change of the parsing code changes the parsed frames,
+# so that cache files of older parsers are not used.
+CACHE_VERSION = 2
+
+MEMORY_CACHE_SIZE = 256
+MEMORY_CACHE = collections.OrderedDict()
+MEMORY_CACHE_LOCK = threading.Lock()
+
+
+def cache_key(path, options):
+    """Key of a parsed file: hash of CACHE_VERSION, its absolute path,
+    modification time, size and the (JSON-serializable) loader options."""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    description = json.dumps(
+        [CACHE_VERSION, path, stat.st_mtime_ns, stat.st_size, options],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha1(description.encode()).hexdigest()
+
+
+def recall(key):
+    """Entry `key` of the memory cache (None if there is none), marked as
+    the most recently used."""
+    with MEMORY_CACHE_LOCK:
+        if key not in MEMORY_CACHE:
+            return None
+        MEMORY_CACHE.move_to_end(key)
+        return MEMORY_CACHE[key]
+
+
+def remember(key, value):
+    """Stores `value` in the memory cache, dropping the least recently
+    used entries beyond MEMORY_CACHE_SIZE."""
+    with MEMORY_CACHE_LOCK:
+        MEMORY_CACHE[key] = value
+        MEMORY_CACHE.move_to_end(key)
+        while len(MEMORY_CACHE) > MEMORY_CACHE_SIZE:
+            MEMORY_CACHE.popitem(last=False)
+
+
+def save_frame(filename, data):
+    """Writes a float Series or DataFrame with a numeric or datetime
+    index to an .npz file."""
+    is_series = isinstance(data, pd.Series)
+    frame = data.to_frame() if is_series else data
+    is_datetime = isinstance(frame.index, pd.DatetimeIndex)
+
+    index = frame.index.values
+    if is_datetime:
+        index = index.astype("datetime64[ns]").view(np.int64)
+
+    tmp_filename = (
+        f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+    )
+    np.savez(
+        tmp_filename,
+        index=index,
+        values=frame.values.astype(np.float64),
+        columns=np.array([str(c) for c in frame.columns]),
+        index_name=np.array(str(frame.index.name or "")),
+        name=np.array(str(data.name) if is_series else ""),
+        is_series=is_series,
+        is_datetime=is_datetime,
+    )
+    os.replace(tmp_filename, filename)
+
+
+def load_frame(filename):
+    """Reads a Series or DataFrame written by save_frame."""
+    with np.load(filename) as npz:
+        index = npz["index"]
+        if npz["is_datetime"]:
+            index = pd.DatetimeIndex(index.view("datetime64[ns]"))
+        index = pd.Index(index, name=str(npz["index_name"]) or None)
+
+        if npz["is_series"]:
+            return pd.Series(
+                index=index,
+                data=npz["values"][:, 0],
+                name=str(npz["name"]) or None,
+            )
+
+        return pd.DataFrame(
+            index=index,
+            columns=list(npz["columns"]),
+            data=npz["values"],
+        )
+
+
+def cached(path, loader, spec=None, **options):
+    """Returns `loader(path, **options)`, a float Series or DataFrame,
+    from the memory or disk cache if the file is unchanged since it was
+    last parsed with these options. The format `spec` the loader parses
+    the file with (e.g. an su10_ingestion.FORMATS entry) is part of the
+    key only."""
+    key = cache_key(path, dict(options, loader=loader.__name__, spec=spec))
+
+    data = recall(key)
+
+    if data is None:
+        filename = os.path.join(
+            CACHE_DIR,
+            f"{os.path.splitext(os.path.basename(path))[0]}_{key[:16]}.npz",
+        )
+
+        if os.path.exists(filename):
+            data = load_frame(filename)
+        else:
+            data = loader(path, **options).astype(np.float64)
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                save_frame(filename, data)
+            except OSError:
+                # read-only checkouts still get the in-memory cache
+                pass
+
+        remember(key, data)
+
+    return data.copy()
+
+
+def frame_hash(data):
+    """Hash of the index, columns and values of a Series or DataFrame."""
+    frame = data.to_frame() if isinstance(data, pd.Series) else data
+    h = hashlib.sha1(pd.util.hash_pandas_object(frame, index=True).values)
+    h.update(json.dumps([str(c) for c in frame.columns]).encode())
+    return h.hexdigest()
+
+
+def memoized(function, data, **options):
+    """Returns `function(data, **options)`, a Series, DataFrame or tuple
+    of them, from the memory cache if it was computed before for equal
+    `data` and options."""
+    key = json.dumps(
+        [function.__module__, function.__name__, frame_hash(data), options],
+        sort_keys=True,
+        default=str,
+    )
+
+    result = recall(key)
+
+    if result is None:
+        result = function(data, **options)
+        remember(key, result)
+
+    if isinstance(result, tuple):
+        return tuple(r.copy() for r in result)
+    return result.copy()
+
+
+def clear_cache(disk=False):
+    """Empties the memory cache, and with `disk` the cache directory."""
+    with MEMORY_CACHE_LOCK:
+        MEMORY_CACHE.clear()
+    if disk and os.path.isdir(CACHE_DIR):
+        for filename in os.listdir(CACHE_DIR):
+            if filename.endswith(".npz"):
+                os.remove(os.path.join(CACHE_DIR, filename))
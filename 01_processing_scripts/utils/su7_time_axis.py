@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+
+# Monthly time axes are handled as integer month numbers, i.e. months
+# since January of year 0 (year * 12 + month - 1). They convert exactly
+# to and from datetime64 and mid-month fractional years, so no rounding
+# of float time stamps is needed to align monthly series.
+EPOCH_MONTH = 1970 * 12
+
+
+def month_number(date):
+    """Month number of a date (string, datetime or Timestamp); integer
+    month numbers are passed through."""
+    if isinstance(date, (int, np.integer)):
+        return int(date)
+    date = pd.Timestamp(date)
+    return date.year * 12 + date.month - 1
+
+
+def month_numbers(dates):
+    """Month numbers of an array or index of dates."""
+    months = np.asarray(dates, dtype="datetime64[ns]").astype("datetime64[M]")
+    return months.astype(np.int64) + EPOCH_MONTH
+
+
+def month_starts(numbers):
+    """DatetimeIndex of the first days of the given month numbers."""
+    months = (np.asarray(numbers, dtype=np.int64) - EPOCH_MONTH).astype(
+        "datetime64[M]"
+    )
+    return pd.DatetimeIndex(months.astype("datetime64[ns]"))
+
+
+def fractional_year_months(years):
+    """Month numbers of fractional-year time stamps, e.g. mid-month
+    values such as 1850.04 or 1850 + 1/24 for January 1850."""
+    return np.floor(np.asarray(years, dtype=float) * 12).astype(np.int64)
+
+
+def mid_month_years(numbers):
+    """Mid-month fractional years of the given month numbers."""
+    return (np.asarray(numbers, dtype=float) + 0.5) / 12
+
+
+def monthly_block(data):
+    """Reshapes the monthly Series or DataFrame `data` into a block
+    (years x 12 x columns) spanning the years of its index.
+
+    Returns the years, the block (NaN for months not in `data`) and the
+    mask (years x 12) of the months present in `data`.
+    """
+    numbers = month_numbers(data.index)
+    first_year = numbers.min() // 12
+    years = np.arange(first_year, numbers.max() // 12 + 1)
+    rows = numbers - first_year * 12
+
+    present = np.zeros(len(years) * 12, dtype=bool)
+    present[rows] = True
+    if present.sum() != len(rows):
+        raise ValueError("monthly_block: more than one value per month.")
+
+    values = np.asarray(data.values, dtype=float).reshape(len(data), -1)
+    block = np.full((len(years) * 12, values.shape[1]), np.nan)
+    block[rows] = values
+
+    return (
+        years,
+        block.reshape(len(years), 12, -1),
+        present.reshape(len(years), 12),
+    )
+
+
+def nan_mean(values, axis):
+    """Mean over the non-NaN `values` along `axis`; NaN where there are
+    none."""
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=axis)
+    sums = np.where(valid, values, 0.0).sum(axis=axis)
+
+    with np.errstate(invalid="ignore"):
+        return sums / counts
+
+
+def period_mean(years, block, start_year, end_year):
+    """Mean of the monthly `block` (years x 12 x ...) over the years
+    `start_year` to `end_year`, per column."""
+    in_period = (years >= start_year) & (years <= end_year)
+    rows = block[in_period]
+    return nan_mean(rows.reshape(-1, *rows.shape[2:]), axis=0)
+
+
+def annual_means(data):
+    """Annual means of the available monthly values of the Series or
+    DataFrame `data`, as data.groupby(data.index.year).mean()."""
+    years, block, present = monthly_block(data)
+    has_months = present.any(axis=1)
+    means = nan_mean(block, axis=1)[has_months]
+
+    # keep single precision data in single precision, as pandas does
+    dtype = np.asarray(data.values).dtype
+    if dtype.kind == "f":
+        means = means.astype(dtype)
+    index = pd.Index(years[has_months], name=data.index.name)
+
+    if isinstance(data, pd.Series):
+        return pd.Series(index=index, data=means[:, 0], name=data.name)
+    return pd.DataFrame(index=index, columns=data.columns, data=means)
+
+
+def complete_years(data):
+    """Rows of the monthly Series or DataFrame `data` in years with all
+    12 months present."""
+    years, _, present = monthly_block(data)
+    complete = present.all(axis=1)
+    return data[complete[month_numbers(data.index) // 12 - years[0]]]
@@ -0,0 +1,156 @@
+import itertools
+import numpy as np
+import pandas as pd
+from . import su2_linear_regression as regression
+from . import su12_parallel as parallel
+
+
+SCORES = ["cv_r2", "residual_variance"]
+
+
+def cross_validated_r2(x, Y, sequential=False, n_folds=5):
+    """R² of out-of-sample predictions of all targets `Y` (months x
+    targets) by the regressors `x`, fitted on the other of `n_folds`
+    contiguous blocks of months. Blocks keep the autocorrelated months
+    together, so neighbouring months do not leak into the test block."""
+    folds = np.array_split(np.arange(len(Y)), n_folds)
+    predicted = np.empty_like(Y)
+
+    for test in folds:
+        train = np.ones(len(Y), dtype=bool)
+        train[test] = False
+        coefficients, _, _ = regression.fit_regressors(
+            x[train], Y[train], sequential
+        )
+        predicted[test] = (
+            coefficients[0] + x[test] @ coefficients[1:]
+        )
+
+    return 1 - ((Y - predicted) ** 2).sum(axis=0) / (
+        (Y - Y.mean(axis=0)) ** 2
+    ).sum(axis=0)
+
+
+def score_configurations(
+    Y, columns, configurations, sequential, score, n_folds
+):
+    """Scores of the given configurations, each a tuple of regressor
+    column keys, averaged over the targets `Y`."""
+    scores = []
+    for configuration in configurations:
+        x = np.column_stack([columns[key] for key in configuration])
+
+        if score == "cv_r2":
+            value = cross_validated_r2(x, Y, sequential, n_folds)
+        else:
+            _, _, residuals = regression.fit_regressors(x, Y, sequential)
+            value = residuals.var(axis=0, ddof=1)
+
+        scores.append(value.mean())
+
+    return scores
+
+
+def grid_search_regression(
+    data,
+    indices,
+    lags=range(0, 13),
+    smoothers=(1, 3, 5, 7, 9, 11),
+    data_smoother=5,
+    sequential=False,
+    score="cv_r2",
+    n_folds=5,
+    n_workers=None,
+):
+    """Evaluates every combination of `lags` (months) and Hamming widths
+    `smoothers` for each of the regression `indices` on the monthly
+    Series or DataFrame `data`, scored by the cross-validated R²
+    ("cv_r2") or the residual variance ("residual_variance") of the
+    regression, averaged over the targets.
+
+    Every lagged and smoothed regressor column and the long-term-signal
+    removal of the data are computed once. The combinations are scored
+    on a process pool of `n_workers` (default: all cores). All
+    combinations use the common period of the indices and the data.
+
+    Returns a DataFrame of all combinations sorted from best to worst
+    score, and the best configuration as a dict of "indices", "lags" and
+    "smoothers", ready to be passed on to regression().
+    """
+    if score not in SCORES:
+        raise KeyError(f"grid_search_regression: unknown score {score}.")
+
+    if isinstance(data, pd.Series):
+        data = data.to_frame()
+
+    data, _ = regression.remove_long_term_signal(data, data_smoother)
+
+    settings = list(itertools.product(lags, smoothers))
+    columns = {
+        (name, lag, smooth): regression.regressor(name, lag, smooth)
+        for name in indices
+        for lag, smooth in settings
+    }
+
+    # common period of all regressor columns and the data
+    time_start = max(
+        [c.dropna().index[0] for c in columns.values()]
+        + [data.dropna().index[0]]
+    )
+    time_end = min(
+        [c.dropna().index[-1] for c in columns.values()]
+        + [data.dropna().index[-1]]
+    )
+
+    Y = data.loc[time_start:time_end].values.astype(float)
+    columns = {
+        key: c.loc[time_start:time_end].values
+        for key, c in columns.items()
+    }
+
+    # one task per setting of the first regressor
+    configurations = [
+        [
+            (key,) + rest
+            for rest in itertools.product(
+                *[[(name,) + s for s in settings] for name in indices[1:]]
+            )
+        ]
+        for key in [(indices[0],) + s for s in settings]
+    ]
+
+    tasks = [
+        (Y, columns, c, sequential, score, n_folds) for c in configurations
+    ]
+    scores = parallel.run_chunks(score_configurations, tasks, n_workers)
+
+    results = pd.DataFrame(
+        [
+            dict(
+                [
+                    item
+                    for name, lag, smooth in configuration
+                    for item in [
+                        (f"{name}_lag", lag),
+                        (f"{name}_smooth", smooth),
+                    ]
+                ],
+                **{score: value},
+            )
+            for group, group_scores in zip(configurations, scores)
+            for configuration, value in zip(group, group_scores)
+        ]
+    )
+    results = results.sort_values(
+        score, ascending=(score == "residual_variance")
+    ).reset_index(drop=True)
+
+    best = {
+        "indices": list(indices),
+        "lags": [int(results.loc[0, f"{name}_lag"]) for name in indices],
+        "smoothers": [
+            int(results.loc[0, f"{name}_smooth"]) for name in indices
+        ],
+    }
+
+    return results, best
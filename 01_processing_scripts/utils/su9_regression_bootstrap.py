@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+from . import su2_linear_regression as regression
+from . import su7_time_axis as time_axis
+from . import su12_parallel as parallel
+
+
+def block_resample(rng, residuals, n_draws, block_length):
+    """Moving-block bootstrap samples (months x draws) of `residuals`:
+    each sample concatenates randomly placed blocks of `block_length`
+    consecutive months, which retains their autocorrelation."""
+    n = len(residuals)
+    block_length = min(block_length, n)
+    n_blocks = -(-n // block_length)
+
+    starts = rng.integers(0, n - block_length + 1, (n_blocks, n_draws))
+    rows = (
+        starts[:, np.newaxis, :]
+        + np.arange(block_length)[np.newaxis, :, np.newaxis]
+    ).reshape(-1, n_draws)[:n]
+
+    return residuals[rows]
+
+
+def bootstrap_coefficients(
+    x, fitted, residuals, n_draws, block_length, sequential, seed
+):
+    """Coefficients (terms x draws) of the regression refitted to
+    `n_draws` block-bootstrap replicates of the data, all solved at
+    once as targets of the same design matrix."""
+    rng = np.random.default_rng(seed)
+    replicates = fitted[:, np.newaxis] + block_resample(
+        rng, residuals, n_draws, block_length
+    )
+
+    coefficients, _, _ = regression.fit_regressors(x, replicates, sequential)
+
+    return coefficients
+
+
+def regression_bootstrap(
+    data,
+    indices,
+    lags,
+    smoothers,
+    data_smoother=1,
+    sequential=False,
+    n_replicates=10000,
+    block_length=24,
+    quantiles=(0.05, 0.17, 0.5, 0.83, 0.95),
+    seed=0,
+    n_workers=None,
+    chunk_size=2500,
+):
+    """Block-bootstrap uncertainty of the regression of the monthly
+    Series `data` (see regression()).
+
+    The residuals of the fit are resampled in blocks of `block_length`
+    months, added to the fitted model and refitted `n_replicates` times.
+    The replicates are split into chunks of `chunk_size` that run on a
+    process pool of `n_workers` (default: all cores; 1 runs in this
+    process), each with its own random stream spawned from `seed` (see
+    su12_parallel.run_chunks).
+
+    Returns a dict with the DataFrame "coefficients" of all replicates
+    (replicates x terms), their "coefficient_quantiles", the "residual"
+    series (including the long-term signal) and the uncertainty band
+    "residual_quantiles" (months x quantiles) of the residual series
+    implied by the replicate coefficients.
+    """
+    if not len(indices) == len(lags) == len(smoothers):
+        raise IndexError(
+            "regression_bootstrap: 'indices', 'lags' and 'smoothers' "
+            "must have same length."
+        )
+
+    anomalies, ltc = regression.remove_long_term_signal(
+        data.to_frame(), data_smoother
+    )
+    anomalies = anomalies.iloc[:, 0]
+    idxs = {
+        f"{name}_lag{lag}": regression.regressor(name, lag, smooth)
+        for name, lag, smooth in zip(indices, lags, smoothers)
+    }
+
+    # longest common period
+    alldata = list(idxs.values()) + [anomalies]
+    time_start = np.max([d.dropna().index[0] for d in alldata])
+    time_end = np.min([d.dropna().index[-1] for d in alldata])
+
+    y = anomalies.loc[time_start:time_end].values.astype(float)
+    x = np.column_stack(
+        [idx.loc[time_start:time_end].values for idx in idxs.values()]
+    ).astype(float)
+
+    coefficients, fitted, residuals = regression.fit_regressors(
+        x, y[:, np.newaxis], sequential
+    )
+    fitted = fitted[:, 0]
+    residuals = residuals[:, 0]
+
+    tasks = [
+        (x, fitted, residuals, n, block_length, sequential)
+        for n in parallel.chunk_sizes(n_replicates, chunk_size)
+    ]
+    draws = np.concatenate(
+        parallel.run_chunks(bootstrap_coefficients, tasks, n_workers, seed),
+        axis=1,
+    )
+    terms = ["const"] + list(idxs.keys())
+
+    # residual series implied by each replicate's coefficients
+    dates = time_axis.month_starts(
+        anomalies.loc[time_start:time_end].index
+    )
+    trend = ltc.iloc[:, 0].reindex(dates).values
+    design = np.hstack([np.ones((len(x), 1)), x])
+    residual = y - design @ coefficients[:, 0] + trend
+    residual_draws = y[:, np.newaxis] - design @ draws
+
+    return {
+        "coefficients": pd.DataFrame(columns=terms, data=draws.T),
+        "coefficient_quantiles": pd.DataFrame(
+            index=pd.Index(quantiles, name="quantile"),
+            columns=terms,
+            data=np.quantile(draws, quantiles, axis=1),
+        ),
+        "residual": pd.Series(index=dates, data=residual, name=data.name),
+        "residual_quantiles": pd.DataFrame(
+            index=dates,
+            columns=pd.Index(quantiles, name="quantile"),
+            data=np.quantile(residual_draws, quantiles, axis=1).T
+            + trend[:, np.newaxis],
+        ),
+    }
@@ -0,0 +1,541 @@
+# Theme song:   Harder, Better, Faster, Stronger
+# Artist:       Daft Punk
+# Album:        Discovery
+# Released:     2001
+
+import os
+import sys
+import time
+import argparse
+import datetime
+import subprocess
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+processing_dir = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..",
+    "01_processing_scripts",
+)
+sys.path.insert(0, processing_dir)
+
+import s1_calculate_climtrace_gmst
+from utils import su1_mw_eot_algorithm as gdm
+from utils import su2_linear_regression as regression
+from utils import su4_mw_eot_parameter_sweep as sweep
+from utils import su6_cache as cache
+
+
+# ends of the shipped smoothing checks: that of the reference files, and
+# one before the flatter trends (2019), which must match them cut there
+SHIPPED_ENDS = [2040, 2016]
+SERIES_LENGTHS = [175, 1000, 10000, 100000]
+BATCH_SIZES = [1, 10, 100, 1000]
+
+REGRESSION_SETTINGS = {
+    "indices": ["nino34_ERSST", "volc"],
+    "lags": [3, 7],
+    "smoothers": [5, 5],
+    "data_smoother": 5,
+    "sequential": True,
+}
+
+TOLERANCE = 1e-8
+
+
+# HELPFUL BITS
+
+def get_version():
+    """Short git revision of the working tree, marked if modified."""
+    try:
+        revision = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=processing_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = "unknown"
+
+    return revision
+
+
+def time_call(function, min_time=0.2, max_repeats=50, setup=None):
+    """Best wall time of repeated calls of `function`, repeating until
+    `min_time` seconds have passed or `max_repeats` calls were made.
+    `setup`, if given, is called before each call and not timed."""
+    times = []
+    while sum(times) < min_time and len(times) < max_repeats:
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def peak_memory(function, setup=None):
+    """Peak memory in bytes allocated during one call of `function`,
+    after calling `setup` if given."""
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def clear_regression_caches():
+    """Empties the memory caches of the regression, so that the next
+    call computes the long-term signal and the regressor columns again,
+    as in a new process. Parsed input files stay cached on disk."""
+    cache.clear_cache()
+    regression.regressor.cache_clear()
+
+
+def regression_cases(case):
+    """The regression benchmark `case` with empty memory caches before
+    every call, and as "regression_cached" reusing the long-term signal
+    and regressor columns of the previous call."""
+    return [
+        dict(case, setup=clear_regression_caches),
+        dict(
+            {k: v for k, v in case.items() if k != "check"},
+            benchmark="regression_cached",
+        ),
+    ]
+
+
+def synthetic_annual_data(n_years, n_series=1, seed=0):
+    """Random-walk annual series (years x series) beginning in 1850,
+    with a constant 1-sigma uncertainty."""
+    rng = np.random.default_rng(seed)
+    years = np.arange(1850, 1850 + n_years)
+    ts = pd.DataFrame(
+        index=years,
+        data=0.1 * rng.standard_normal((n_years, n_series)).cumsum(axis=0),
+    )
+    ts_unc = pd.Series(index=years, data=0.05)
+
+    return ts, ts_unc
+
+
+def smoother_settings(years):
+    """MW-EOT settings for data covering `years`, with the flatter trends
+    and the extension of the shipped decadal means."""
+    nDataEnd = int(years[-1])
+    return {
+        "nStart": int(years[0]),
+        "nEnd": nDataEnd + 17,
+        "nFlattertrendsStart": nDataEnd - 4,
+        "nDataEnd": nDataEnd,
+    }
+
+
+# READING STUFF
+
+def read_reference(filename):
+    return pd.read_csv(
+        os.path.join(processing_dir, "..", "02_output_data", filename),
+        index_col=0,
+    )
+
+
+# BENCHMARK CASES
+
+def shipped_cases():
+    """Benchmarks of the shipped ClimTrace inputs, each with a check of
+    the outputs against the reference files in 02_output_data."""
+    cases = []
+
+    for var in ["GMST", "GSAT"]:
+        for mod in ["", "_nino34_ERSSTlag3smooth5_volclag7smooth5"]:
+            annual = read_reference(
+                f"{var.lower()}_annual{mod}_climtrace_1850-2024.csv"
+            )
+            reference = read_reference(
+                f"{var.lower()}_decadalmean{mod}_climtrace_1850-2040.csv"
+            )
+
+            for nEnd in SHIPPED_ENDS:
+
+                def smooth(annual=annual, var=var, nEnd=nEnd):
+                    return gdm.mw_eot_smoother(
+                        annual[f"ClimTrace_{var}"],
+                        annual[f"ClimTrace_{var}_1sigma"],
+                        nStart=1850,
+                        nEnd=nEnd,
+                    )
+
+                def check(smooth=smooth, reference=reference, var=var):
+                    X, DX, X_unc, DX_unc = smooth()
+                    outputs = {
+                        "DecadalMean": X,
+                        "DecadalMean_1sigma": X_unc,
+                        "DecadalDerivative": DX,
+                        "DecadalDerivative_1sigma": DX_unc,
+                    }
+                    return max(
+                        (
+                            output
+                            - reference[f"ClimTrace_{var}_{name}"].reindex(
+                                output.index
+                            )
+                        )
+                        .abs()
+                        .max()
+                        for name, output in outputs.items()
+                    )
+
+                label = f"{var.lower()}_annual{mod}"
+                if nEnd != SHIPPED_ENDS[0]:
+                    label += f"_end{nEnd}"
+
+                cases.append(
+                    {
+                        "benchmark": "mw_eot_smoother",
+                        "input": label,
+                        "n_points": len(annual),
+                        "batch": 1,
+                        "function": smooth,
+                        "check": check,
+                    }
+                )
+
+    # parameter sweep including an nEnd (2014) before the last core year
+    # of the narrow windows (2015), whose settings must be left empty
+    annual = read_reference("gmst_annual_climtrace_1850-2024.csv")
+    reference = read_reference("gmst_decadalmean_climtrace_1850-2040.csv")
+    sweep_settings = {
+        "mInnerHW": (6, 8),
+        "mOuterHW": (9, 11),
+        "nFlattertrendsStart": (2019,),
+        "nEnd": (2014, 2040),
+        "nDataEnd": 2023,
+    }
+
+    def sweep_smoother(annual=annual):
+        return sweep.sweep_mw_eot_parameters(
+            annual["ClimTrace_GMST"],
+            annual["ClimTrace_GMST_1sigma"],
+            n_workers=1,
+            **sweep_settings,
+        )
+
+    def check_sweep(annual=annual, reference=reference):
+        _, results = sweep.smooth_parameter_group(
+            annual["ClimTrace_GMST"],
+            annual["ClimTrace_GMST_1sigma"],
+            6,
+            9,
+            [(2019, 2014), (2019, 2040)],
+            1850,
+            2023,
+        )
+        X = sweep_smoother()["X"].sel(
+            mInnerHW=8, mOuterHW=11, nFlattertrendsStart=2019, nEnd=2040
+        )
+        if list(results) != [(2019, 2040)]:
+            return np.inf
+        return (
+            (
+                X.to_series().droplevel("member")
+                - reference["ClimTrace_GMST_DecadalMean"]
+            )
+            .abs()
+            .max()
+        )
+
+    cases.append(
+        {
+            "benchmark": "sweep_mw_eot_parameters",
+            "input": "gmst_annual",
+            "n_points": len(annual),
+            "batch": 8,
+            "function": sweep_smoother,
+            "check": check_sweep,
+        }
+    )
+
+    gmst_data = s1_calculate_climtrace_gmst.monthly_gmst_data(
+        os.path.join(
+            processing_dir, "..", "00_input_data", "surface_temperature"
+        )
+    )
+    reference = read_reference(
+        "gmst_annual_nino34_ERSSTlag3smooth5_volclag7smooth5"
+        "_climtrace_1850-2024.csv"
+    )
+
+    def regress():
+        return regression.regression(
+            gmst_data["ClimTrace_GMST"], **REGRESSION_SETTINGS
+        )
+
+    def check_regression():
+        residual, _ = regress()
+        annual = residual.groupby(residual.index.year).mean()
+        return (annual - reference["ClimTrace_GMST"]).abs().max()
+
+    cases.extend(
+        regression_cases(
+            {
+                "benchmark": "regression",
+                "input": "gmst_monthly",
+                "n_points": len(gmst_data),
+                "batch": 1,
+                "function": regress,
+                "check": check_regression,
+            }
+        )
+    )
+
+    return cases
+
+
+def synthetic_cases(series_lengths, batch_sizes):
+    """Benchmarks of synthetic random-walk series of the given lengths
+    (in years) and, for the shortest length, of the given batch sizes."""
+    cases = []
+
+    for n_years in series_lengths:
+        ts, ts_unc = synthetic_annual_data(n_years)
+        series = ts[0]
+
+        cases.append(
+            {
+                "benchmark": "eot_filter",
+                "input": "synthetic",
+                "n_points": n_years,
+                "batch": 1,
+                "function": lambda series=series: gdm.eot_filter(
+                    series, 20, 3
+                ),
+            }
+        )
+        cases.append(
+            {
+                "benchmark": "mw_eot_smoother",
+                "input": "synthetic",
+                "n_points": n_years,
+                "batch": 1,
+                "function": lambda series=series, ts_unc=ts_unc: (
+                    gdm.mw_eot_smoother(
+                        series, ts_unc, **smoother_settings(series.index)
+                    )
+                ),
+            }
+        )
+
+    n_years = min(series_lengths)
+    for batch in batch_sizes:
+        ts, ts_unc = synthetic_annual_data(n_years, batch)
+
+        cases.append(
+            {
+                "benchmark": "eot_filter",
+                "input": "synthetic",
+                "n_points": n_years,
+                "batch": batch,
+                "function": lambda ts=ts: gdm.eot_filter(ts, 20, 3),
+            }
+        )
+        cases.append(
+            {
+                "benchmark": "mw_eot_smoother_batch",
+                "input": "synthetic",
+                "n_points": n_years,
+                "batch": batch,
+                "function": lambda ts=ts, ts_unc=ts_unc: (
+                    gdm.mw_eot_smoother_batch(
+                        ts, ts_unc, **smoother_settings(ts.index)
+                    )
+                ),
+            }
+        )
+
+    # monthly mode on 175 years of monthly data
+    months = pd.date_range("1850-01-01", "2024-12-01", freq="MS")
+    for batch in batch_sizes:
+        if batch > 100:
+            continue
+        ts, ts_unc = synthetic_annual_data(len(months), batch)
+        ts.index = months
+        ts_unc.index = months
+
+        cases.append(
+            {
+                "benchmark": "mw_eot_smoother_monthly",
+                "input": "synthetic",
+                "n_points": len(months),
+                "batch": batch,
+                "function": lambda ts=ts, ts_unc=ts_unc: (
+                    gdm.mw_eot_smoother_monthly(
+                        ts,
+                        ts_unc,
+                        nStart="1850-01",
+                        nEnd="2040-12",
+                        nFlattertrendsStart="2020-01",
+                        nDataEnd="2024-12",
+                    )
+                ),
+            }
+        )
+
+    # the regression removes the long-term signal for 1850-2024 and is
+    # limited to the period of the regression indices, so synthetic
+    # monthly series beyond 175 years would only be truncated; it
+    # handles one series per call, so batches scale linearly
+    months = pd.date_range("1850-01-01", "2024-12-01", freq="MS")
+    rng = np.random.default_rng(0)
+    data = pd.Series(
+        index=months,
+        data=0.1 * rng.standard_normal(len(months)).cumsum(),
+    )
+
+    cases.extend(
+        regression_cases(
+            {
+                "benchmark": "regression",
+                "input": "synthetic",
+                "n_points": len(months),
+                "batch": 1,
+                "function": lambda: regression.regression(
+                    data, **REGRESSION_SETTINGS
+                ),
+            }
+        )
+    )
+
+    return cases
+
+
+def run_case(case, version):
+    seconds = time_call(case["function"], setup=case.get("setup"))
+
+    result = {
+        "version": version,
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "benchmark": case["benchmark"],
+        "input": case["input"],
+        "n_points": case["n_points"],
+        "batch": case["batch"],
+        "seconds": seconds,
+        "points_per_second": case["n_points"] * case["batch"] / seconds,
+        "peak_memory_bytes": peak_memory(
+            case["function"], setup=case.get("setup")
+        ),
+        "max_abs_deviation": np.nan,
+        "reference_ok": np.nan,
+    }
+
+    if "check" in case:
+        deviation = case["check"]()
+        result["max_abs_deviation"] = deviation
+        result["reference_ok"] = bool(deviation <= TOLERANCE)
+
+    return result
+
+
+def compare_versions(results):
+    """Ratio of the run times of the latest version to the previous one
+    recorded in `results`, per benchmark case."""
+    versions = list(dict.fromkeys(results["version"]))
+    if len(versions) < 2:
+        return None
+
+    keys = ["benchmark", "input", "n_points", "batch"]
+    latest, previous = (
+        results[results["version"] == v].groupby(keys)["seconds"].min()
+        for v in versions[-1:-3:-1]
+    )
+
+    return (latest / previous).dropna().rename(
+        f"{versions[-1]} / {versions[-2]}"
+    )
+
+
+# argparse for the benchmark selection
+def parse_benchmark_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the smoothing and regression utilities."
+    )
+
+    parser.add_argument(
+        "--lengths",
+        type=int,
+        nargs="+",
+        default=SERIES_LENGTHS,
+        help="Lengths (in years) of the synthetic series.",
+    )
+    parser.add_argument(
+        "--batch",
+        type=int,
+        nargs="+",
+        default=BATCH_SIZES,
+        help="Numbers of synthetic series smoothed at once.",
+    )
+    parser.add_argument(
+        "--skip-shipped",
+        action="store_true",
+        help="Only run the synthetic benchmarks.",
+    )
+    parser.add_argument(
+        "--output",
+        default=os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "results",
+            "benchmark_results.csv",
+        ),
+        help="CSV file the results are appended to.",
+    )
+
+    return parser.parse_args()
+
+
+# MAIN
+
+def main():
+    args = parse_benchmark_args()
+    version = get_version()
+
+    cases = []
+    if not args.skip_shipped:
+        cases += shipped_cases()
+    cases += synthetic_cases(args.lengths, args.batch)
+
+    results = []
+    for case in cases:
+        result = run_case(case, version)
+        print(
+            f"{result['benchmark']:>22} {result['input']:>40} "
+            f"n={result['n_points']:<7} batch={result['batch']:<5} "
+            f"{result['seconds']:.4g} s "
+            f"{result['peak_memory_bytes'] / 2**20:.1f} MiB"
+        )
+        results.append(result)
+
+    results = pd.DataFrame(results)
+
+    if not results["reference_ok"].dropna().all():
+        print("WARNING: outputs deviate from the reference files.")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    if os.path.exists(args.output):
+        results = pd.concat([pd.read_csv(args.output), results])
+    results.to_csv(args.output, index=False)
+
+    comparison = compare_versions(results)
+    if comparison is not None:
+        print(comparison.to_string())
+
+
+if __name__ == "__main__":
+    main()